@@ -0,0 +1,263 @@
+#!/usr/bin/python
+"""
+Benchmarks for dynamic_table
+
+Generates synthetic tables at several sizes and times ingest (add_row,
+set_col_names), filtering (TableFilter.filter_table with string, number and
+date rules) and rendering (print_table with RenderText, RenderCSV and
+RenderHTML), with and without colors. Each case is timed on its own, then run
+once more under tracemalloc to record its peak memory. The date parser cache
+is cleared before every run, so date filters are always timed cold. Results
+are written as JSON, which can be compared against a saved baseline.
+
+Usage:
+  python benchmarks/bench_dynamic_table.py run [-o results.json] [--rows 1000,10000] [--cols 4,20]
+  python benchmarks/bench_dynamic_table.py compare baseline.json results.json [--threshold 0.1]
+
+Sizes where rows*cols is over --max-cells are skipped, so the default run
+finishes in a few minutes. Pass --max-cells 0 to run every size.
+"""
+import sys
+import os
+import gc
+import json
+import time
+import random
+import platform
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dynamic_table
+
+def_rows=[1000,10000,100000,1000000]
+def_cols=[4,20,100]
+def_max_cells=2000000
+def_repeat=3
+def_threshold=0.10
+devnull=None #Opened by run()
+colors=['red','green','bold','bg_blue,white','']
+
+def make_rows(row_count,col_count,seed=0):
+  """
+  Make a list of synthetic rows. Column 1 is a date, column 2 an integer,
+  column 3 a float, and the rest are strings of varying width.
+
+  Args:
+    row_count:    Number of rows
+    col_count:    Number of columns (at least 4)
+    seed:         Seed for the random data, so runs are comparable
+
+  Returns:
+    list of lists
+  """
+  rnd=random.Random(seed)
+  words=['alpha','bravo','charlie','delta','echo','foxtrot','golf','hotel','india','juliett']
+  start=datetime(2020,1,1)
+  rows=[]
+  for i in range(row_count):
+    row=[(start+timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S'),str(rnd.randint(0,100000)),'%.2f' % (rnd.random()*1000)]
+    for c in range(3,col_count):
+      row.append('-'.join(rnd.choice(words) for n in range(1+(c+i) % 3)))
+    rows.append(row)
+  return rows
+
+def make_colors(row_count,col_count,seed=0):
+  """
+  Make color lists to go with make_rows, coloring about one cell in four
+
+  Args:
+    row_count:    Number of rows
+    col_count:    Number of columns
+    seed:         Seed for the random colors
+
+  Returns:
+    list of lists
+  """
+  rnd=random.Random(seed)
+  return [[rnd.choice(colors) if rnd.random() < 0.25 else '' for c in range(col_count)] for i in range(row_count)]
+
+def new_table(renderer=None,output=None):
+  """
+  Create a Table writing to os.devnull, so output speed doesn't depend on a
+  terminal
+  """
+  return dynamic_table.Table(renderer or dynamic_table.RenderText(),output=output or devnull)
+
+def fill_table(table,rows,row_colors):
+  if row_colors:
+    for row,row_color in zip(rows,row_colors):
+      table.add_row(row,row_color)
+  else:
+    for row in rows:
+      table.add_row(row)
+  return table
+
+#Cases get (rows,row_colors,col_names) and return a function that runs the
+# thing being measured, so set up isn't counted
+def case_add_row(rows,row_colors,col_names):
+  return lambda: fill_table(new_table(),rows,row_colors)
+
+def case_set_col_names(rows,row_colors,col_names):
+  table=fill_table(new_table(),rows,row_colors)
+  return lambda: table.set_col_names(col_names)
+
+def filter_case(filter_txt):
+  def case(rows,row_colors,col_names):
+    table=fill_table(new_table(),rows,row_colors)
+    table_filter=dynamic_table.TableFilter(filter_txt)
+    return lambda: table_filter.filter_table(table)
+  return case
+
+def render_case(renderer_class):
+  def case(rows,row_colors,col_names):
+    table=fill_table(new_table(renderer_class()),rows,row_colors)
+    table.set_col_names(col_names)
+    return table.print_table
+  return case
+
+cases=[
+  ('add_row',case_add_row),
+  ('set_col_names',case_set_col_names),
+  ('filter_string',filter_case('1-;4/echo')),
+  ('filter_number',filter_case('1-;2>50000')),
+  ('filter_date',filter_case('1-;1<2020-03-01 00:00:00')),
+  ('print_table_text',render_case(dynamic_table.RenderText)),
+  ('print_table_csv',render_case(dynamic_table.RenderCSV)),
+  ('print_table_html',render_case(dynamic_table.RenderHTML)),
+]
+
+def clear_caches():
+  """
+  Empty the module level caches dynamic_table keeps between calls, so every
+  run starts cold. This is the memoized date parser, which would otherwise
+  make every filter_date run after the first one measure cache hits.
+  """
+  if dynamic_table._date_epoch is not None:
+    dynamic_table._date_epoch.cache_clear()
+
+def measure(func,repeat):
+  """
+  Time func, then run it once more under tracemalloc. Caches are cleared
+  before each run.
+
+  Args:
+    func:     Function to measure
+    repeat:   Number of timed runs, the best is kept
+
+  Returns:
+    dict with seconds (best run), mean_seconds and peak_bytes
+  """
+  times=[]
+  for i in range(repeat):
+    clear_caches()
+    gc.collect()
+    start=time.perf_counter()
+    func()
+    times.append(time.perf_counter()-start)
+  clear_caches()
+  gc.collect()
+  tracemalloc.start()
+  try:
+    func()
+    peak=tracemalloc.get_traced_memory()[1]
+  finally:
+    tracemalloc.stop()
+  return {'seconds': min(times), 'mean_seconds': sum(times)/len(times), 'peak_bytes': peak}
+
+def run(args):
+  """
+  Run every case at every size, writing results as JSON
+  """
+  global devnull
+  selected=set(args.cases.split(',')) if args.cases else None
+  results=[]
+  devnull=open(os.devnull,'w')
+  try:
+    for row_count in args.rows:
+      for col_count in args.cols:
+        if args.max_cells and row_count*col_count > args.max_cells:
+          print('skip rows=%d cols=%d (over --max-cells)' % (row_count,col_count),file=sys.stderr)
+          continue
+        rows=make_rows(row_count,col_count)
+        col_names=['Col%d' % (c+1) for c in range(col_count)]
+        for colored in (False,True):
+          row_colors=make_colors(row_count,col_count) if colored else None
+          for name,case in cases:
+            if selected and name not in selected:
+              continue
+            result=measure(case(rows,row_colors,col_names),args.repeat)
+            result.update(case=name,rows=row_count,cols=col_count,colors=colored)
+            results.append(result)
+            print('%-18s rows=%-8d cols=%-4d colors=%-5s %10.4fs %12d bytes' % (name,row_count,col_count,colored,result['seconds'],result['peak_bytes']),file=sys.stderr)
+  finally:
+    devnull.close()
+  report={
+    'created': datetime.now().isoformat(),
+    'python': platform.python_version(),
+    'platform': platform.platform(),
+    'results': results,
+  }
+  if args.output == '-':
+    json.dump(report,sys.stdout,indent=1)
+  else:
+    with open(args.output,'w') as f:
+      json.dump(report,f,indent=1)
+  return 0
+
+def result_key(result):
+  return (result['case'],result['rows'],result['cols'],result['colors'])
+
+def compare(args):
+  """
+  Compare results against a baseline, both written by run. Exits with 1 when
+  any case got slower (or used more memory) by more than the threshold.
+  """
+  with open(args.baseline) as f:
+    baseline=dict((result_key(r),r) for r in json.load(f)['results'])
+  with open(args.results) as f:
+    results=json.load(f)['results']
+  regressions=0
+  print('%-18s %8s %5s %6s %10s %10s %8s %8s' % ('case','rows','cols','colors','base s','new s','time','memory'))
+  for result in results:
+    base=baseline.get(result_key(result))
+    if not base:
+      continue
+    time_change=result['seconds']/base['seconds']-1 if base['seconds'] else 0
+    mem_change=result['peak_bytes']/base['peak_bytes']-1 if base['peak_bytes'] else 0
+    flag=''
+    if time_change > args.threshold or mem_change > args.threshold:
+      flag=' REGRESSION'
+      regressions+=1
+    print('%-18s %8d %5d %6s %10.4f %10.4f %+7.1f%% %+7.1f%%%s' % (result['case'],result['rows'],result['cols'],result['colors'],base['seconds'],result['seconds'],time_change*100,mem_change*100,flag))
+  print('%d regression(s) over %.0f%%' % (regressions,args.threshold*100))
+  return 1 if regressions else 0
+
+def int_list(txt):
+  return [int(v) for v in txt.split(',')]
+
+def main(argv=None):
+  parser=argparse.ArgumentParser(description='Benchmarks for dynamic_table')
+  commands=parser.add_subparsers(dest='command')
+  commands.required=True
+  run_parser=commands.add_parser('run',help='Run the benchmarks and write results as JSON')
+  run_parser.add_argument('-o','--output',default='-',help='File to write results to. Default=- (stdout)')
+  run_parser.add_argument('--rows',type=int_list,default=def_rows,help='Comma separated row counts. Default=%s' % (','.join(map(str,def_rows))))
+  run_parser.add_argument('--cols',type=int_list,default=def_cols,help='Comma separated column counts (at least 4). Default=%s' % (','.join(map(str,def_cols))))
+  run_parser.add_argument('--max-cells',type=int,default=def_max_cells,help='Skip sizes with more than this many cells, 0 for no limit. Default=%d' % (def_max_cells))
+  run_parser.add_argument('--repeat',type=int,default=def_repeat,help='Timed runs per case, the best is kept. Default=%d' % (def_repeat))
+  run_parser.add_argument('--cases',help='Comma separated case names to run. Default=all of: %s' % (','.join(name for name,case in cases)))
+  compare_parser=commands.add_parser('compare',help='Compare results against a baseline')
+  compare_parser.add_argument('baseline',help='Baseline results JSON')
+  compare_parser.add_argument('results',help='New results JSON')
+  compare_parser.add_argument('--threshold',type=float,default=def_threshold,help='Fraction slower (or more memory) that counts as a regression. Default=%.2f' % (def_threshold))
+  args=parser.parse_args(argv)
+  if args.command == 'run':
+    if min(args.cols) < 4:
+      parser.error('--cols needs at least 4 columns')
+    return run(args)
+  return compare(args)
+
+if __name__ == '__main__':
+  sys.exit(main())
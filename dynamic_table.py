@@ -22,6 +22,8 @@ as:
 The interface to dynamic table is pretty straight forward and all of the parameters
 passed to the general functions, such as:
  * add_row
+ * add_rows
+ * extend
  * set_table_type
  * set_col_widths
  * set_col_names
@@ -35,6 +37,15 @@ to do so when instantiating the Table class.  Like so:
 Doing this will ensure that any print functions get written to the file instead of
 stdout.
 
+Output can also be an OutputSink object, which batches writes before they are
+handed off. The built in sinks are:
+ * StringSink(flush_size=65536)                  - in memory, backed by io.StringIO
+ * FileSink(output,flush_size=65536)             - batches writes to a file with writelines
+ * BytesSink(output,encoding='utf-8',flush_size=65536) - encodes once per flush for binary files
+For example:
+ my_table=Table(output=FileSink(open('/path/to/file','w'),flush_size=1048576))
+render() flushes the sink when done, adhoc tables should call flush_output().
+
 You can also modify this behavior by defining output as 'String' and then 
 the print functions will build the table in the variable "built_buffer", this does
 not get cleared automatically. When done with the data, call the function empty_output().
@@ -56,6 +67,63 @@ Example of rendering the table to a string:
  my_table.add_row(['c','d'])
  my_string=str(my_table)
 
+Tables holding a lot of rows can be created with storage='columnar'. Instead
+of keeping a list per row, each column is then kept in a compact container
+(an array for numeric columns, an offsets+blob buffer for strings), which
+takes a fraction of the memory. Rendering and filtering work the same, but
+rows, row_colorization and row_render_opts become read only sequences, rows
+are handed back as tuples of strings. For example:
+ my_table=Table(storage='columnar')
+ my_table.add_row(['a','1'])
+
+Lots of rows are best added with add_rows(rows,colors=None,renderer_opts=None)
+which takes any iterable of rows, and does the filter, padding and column width
+work a batch of rows at a time. extend(other) adds the rows of another Table,
+merging in its column widths instead of looking at every row again.
+
+Table.from_csv(path_or_file,sep=',',header=True,table_filter=None) loads a
+CSV/TSV file a batch of rows at a time, only keeping the rows and columns the
+table filter lets through.
+
+Table.map_file(path,sep=',',header=True) gives a read only Table over a
+delimited file without loading it. The file is memory mapped and indexed in one
+scan (which also works out the column widths), and rows are only decoded when
+rendered or filtered.
+
+save(path) writes the table to a binary snapshot file, column by column, along
+with its colors, renderer options and column widths. Table.load(path) memory
+maps the file back in as a columnar table without parsing it, so loading takes
+about the same time however big the table is.
+
+enable_stats(hook=None) turns on counters and cumulative timings for adding
+rows, filter checks, column width updates, each renderer phase (print_header,
+print_rows, print_footer) and output writes, which stats() returns. hook is
+called with (phase,seconds) for every timed call, for exporting to metrics.
+Tables without stats enabled run exactly the same code as before.
+
+sort_by(cols,reverse=False) sorts the rows (with their colors and renderer
+options) on one or more column ids. Columns are compared as numbers, dates or
+strings, picked the same way filter rules type their values. Tables with more
+than sort_budget_rows rows are sorted in runs on disk that are then merged.
+
+group_by(key_cols,table_filter=None).agg({col: func}) summarizes the rows in
+a single pass, with func one of count, sum, min, max, mean (or a list of them),
+and returns a new Table with a row per group. For example:
+ summary=my_table.group_by(1).agg({3: 'sum', 4: ['min','max']})
+
+Tables can be bounded with max_rows=N and/or max_age=(col,seconds), for live
+tail views. The oldest rows are dropped as rows are added and column widths
+shrink back when the widest rows go. For example:
+ tail=Table(max_rows=50,max_age=(1,600))
+
+Tables that many threads add rows to at once should be created with
+concurrent=True. Each thread buffers its rows, which are merged into the table
+under a lock in batches, and renders work off a snapshot of the table so they
+don't hold up the threads adding rows. len(), filter_table() and the like
+merge the buffered rows first, call merge_pending() before reading rows
+directly. This is for thread safety, not speed: rows are still stored one
+batch at a time, so many threads don't add rows faster than one would.
+
 =========
 Renderers
 =========
@@ -71,6 +139,30 @@ the parameters for each differs for each type of table (all return string types)
  * print_rows   - Prints all the rows in the table
  * print_table  - Prints the entire table
 
+Renderers can also provide iter_table(table,chunk_rows), a generator that yields
+the table in pieces (header, batches of rows, footer). Table.render() writes
+each piece to the output as it is produced, so large tables don't need to be
+built up as one big string first. The built in renderers all provide it, and
+Table.iter_render(chunk_rows=...) gives direct access to the chunks.
+
+The built in renderers take row_cache=True, for tables that get rendered again
+and again while rows are added. The rendered rows are kept with the table and
+the next render only renders the rows added since. Changing column widths or
+renderer options starts the cache over. Only add rows with add_row() when using it.
+
+They also take parallel=N (and parallel_pool='process' or 'thread') to render
+the rows of big tables on several cores. Runs of rows are rendered in a
+concurrent.futures pool and written out in their original order.
+
+Part of a table (a page) can be rendered with render(offset=,limit=) or
+Table.page(n,size), which only render the rows asked for. widths='global' (the
+default) keeps the column widths of the whole table so pages line up, and
+widths='page' sizes the columns to just the rows on the page.
+
+For asyncio code Table.render_async(writer) renders to an asyncio stream
+writer a chunk at a time, awaiting writer.drain() in between, and
+Table.add_rows_async(rows) adds rows from an async iterable.
+
 There are extra functions for the following renderers:
  'RenderText'
   * print_footer - Prints the footer of a text table
@@ -144,6 +236,11 @@ If the first rule is a comma separated list it is referred to as a column
 rule, all others are considered row rules. Additional row rules all have to be
 true for a row to pass the filter.
 
+Dates in ISO-8601 like formats (2014-07-30 12:00:00, 20140730T12:00:00Z...)
+are parsed directly, other formats are handed to dateutil. Dates without a
+timezone are read as local time, and parsed dates are cached so repeated
+timestamps are only parsed once.
+
 Filter expression examples:
   #Only print columns 1,3 and 4 and only rows where column 1 is after
   #"2014-07-30 12:00:00"
@@ -155,6 +252,18 @@ If not providing a filter_txt when creating a TableFilter object, you can add
 more rules using the add_row_rule function and the set_col_rule. Which can be
 useful if the [comparison value] contains a semi-colon in it.
 
+Tables that get filtered a lot can have secondary indexes on columns, so
+filters don't have to scan every row. Hash indexes are used for '=' and '!='
+rules, sorted indexes for '<','<=','>','>=' (and '=') rules:
+  thing.create_index(4)            #4=Active
+  thing.create_index(1,'sorted')   #1>2014-07-30
+Indexes are kept up to date as rows are added.
+
+TableFilter objects can also be created with use_numpy=True/False, to force
+or disable evaluating the row rules as NumPy vectorized masks in
+filter_table. By default this is done for columnar tables of 50000 rows or
+more when NumPy is installed.
+
 TableFilter provides the following useful functions:
   filter_table(table):    returns a Table object that has been filtered
                           according to the rules in the TableFilter
@@ -208,7 +317,238 @@ Version: 0.8.3
 """
 
 import sys #This is only really needed so we can default out output to sys.stdout
-from dateutil.parser import parse as dateparse #Used for TableFilter class converting strings to dates
+import io #Used by StringSink for the in memory output buffer
+from array import array #Used by ColumnStore for compact per column containers
+from itertools import repeat, islice, compress, zip_longest, accumulate
+from operator import itemgetter, gt
+from bisect import bisect_left, bisect_right #Used by sorted ColumnIndexes
+from collections import deque #Used by bounded (max_rows/max_age) tables and parallel rendering
+from time import perf_counter #Used by TableStats
+from abc import ABC, abstractmethod #Used by OutputSink
+
+def _pad_row(row,col_count):
+  """
+  Pad a row with empty cells up to col_count. The row stored in the table is
+  left alone, a padded copy is returned instead.
+
+  Args:
+    row:        List/tuple of cells
+    col_count:  Number of cells the row should have
+
+  Returns:
+    List/tuple
+  """
+  c_count=len(row)
+  if c_count < col_count:
+    return list(row)+['']*(col_count-c_count)
+  return row
+
+def _iter_from(seq,start):
+  """
+  Iterate over a sequence (list, or ColumnStore view) starting at index start
+
+  Args:
+    seq:      Sequence to iterate over
+    start:    Index of the first element
+
+  Returns:
+    Iterator
+  """
+  if not start:
+    return iter(seq)
+  iter_from=getattr(seq,'iter_from',None)
+  if iter_from:
+    return iter_from(start)
+  return islice(seq,start,None)
+
+class _TableSlice:
+  """
+  Stand in for a Table holding just a run of its rows and the layout needed
+  to render them. This is what gets handed to pool workers.
+  """
+  _stats=None #See Table.enable_stats()
+  def __init__(self,table,rows,row_colorization,row_render_opts):
+    self.rows=rows
+    self.row_colorization=row_colorization
+    self.row_render_opts=row_render_opts
+    self.col_count=table.col_count
+    self.col_names=list(table.col_names)
+    self.col_widths=list(table.col_widths)
+    self.col_widths_real=list(table.col_widths_real)
+    self.data_max_width=table.data_max_width
+  def __len__(self):
+    return len(self.rows)
+  def _cached_row_chunks(self,key,render_from,row_count=None):
+    #Slices don't keep a render cache of their own
+    return render_from(0)
+
+class _RowsPrefix:
+  """
+  Read only view of the first row_count entries of a sequence that may still
+  be appended to (rows, row_colorization, row_render_opts)
+  """
+  def __init__(self,seq,row_count):
+    self._seq=seq
+    self._row_count=row_count
+  def __len__(self):
+    return self._row_count
+  def __getitem__(self,i):
+    if isinstance(i,slice):
+      return self._seq[slice(*i.indices(self._row_count))]
+    if i < 0:
+      i+=self._row_count
+    if i < 0 or i >= self._row_count:
+      raise IndexError('row index out of range')
+    return self._seq[i]
+  def __iter__(self):
+    return islice(self._seq,self._row_count)
+  def iter_from(self,start):
+    return islice(_iter_from(self._seq,start),max(self._row_count-start,0))
+
+class _TableSnapshot(_TableSlice):
+  """
+  Consistent view of a concurrent Table, for rendering while rows keep being
+  added. See Table.snapshot()
+  """
+  def __init__(self,table):
+    row_count=len(table.rows)
+    if table._ring:
+      #Bounded tables drop rows off the front, so they can't be viewed in place
+      _TableSlice.__init__(self,table,list(table.rows),list(table.row_colorization),list(table.row_render_opts))
+    else:
+      _TableSlice.__init__(self,table,_RowsPrefix(table.rows,row_count),_RowsPrefix(table.row_colorization,row_count),_RowsPrefix(table.row_render_opts,row_count))
+    self.data_cur_max_width=table.data_cur_max_width
+    self._table=table
+  def _cached_row_chunks(self,key,render_from):
+    return self._table._cached_row_chunks(key,render_from,len(self.rows))
+
+class _TableWindow(_TableSlice):
+  """
+  A run of rows of a Table (a page), for rendering just those rows. See
+  Table.window()
+
+  Args:
+    table:    Table (or snapshot of one) to take the rows from
+    offset:   Index of the first row
+    limit:    Max number of rows, None for all rows from offset on
+    widths:   'global' to lay out the rows with the column widths of the whole
+              table, so all pages line up, or 'page' to size the columns to
+              just the rows in the window
+  """
+  def __init__(self,table,offset=0,limit=None,widths='global'):
+    if widths not in ('global','page'):
+      raise ValueError("widths must be one of: 'global', 'page'")
+    offset=max(int(offset),0)
+    stop=None if limit is None else offset+max(int(limit),0)
+    window=slice(offset,stop)
+    _TableSlice.__init__(self,table,table.rows[window],table.row_colorization[window],table.row_render_opts[window])
+    if widths == 'page':
+      self._page_widths()
+  def _page_widths(self):
+    """
+    Size the columns to the column names and the rows in the window
+    """
+    col_widths_real=[0]*self.col_count
+    for cells in [self.col_names]+self.rows:
+      for i,c in enumerate(cells):
+        c_len=len(c) if isinstance(c,str) else len(str(c))
+        if c_len > col_widths_real[i]:
+          col_widths_real[i]=c_len
+    self.col_widths_real=col_widths_real
+    width=0
+    for i,c_len in enumerate(col_widths_real):
+      if i < len(self.col_widths) and self.col_widths[i] > 0:
+        width+=self.col_widths[i]
+      else:
+        width+=c_len
+    self.data_max_width=width
+
+def _render_phases(renderer,table):
+  """
+  Returns the renderer's print_header, iter_rows and print_footer (None for
+  renderers without one). When the table has stats enabled they are timed as
+  the print_header, print_rows and print_footer phases, see
+  Table.enable_stats()
+  """
+  print_footer=getattr(renderer,'print_footer',None)
+  stats=table._stats
+  if stats is None:
+    return renderer.print_header,renderer.iter_rows,print_footer
+  if print_footer:
+    print_footer=stats.wrap('print_footer',print_footer)
+  return stats.wrap('print_header',renderer.print_header),stats.wrap_chunks('print_rows',renderer.iter_rows),print_footer
+
+def _render_slice(job):
+  """
+  Pool worker, renders all rows of a _TableSlice
+
+  Args:
+    job:    Tuple of (renderer, _TableSlice, args for renderer._render_rows
+            coming before start)
+
+  Returns:
+    String
+  """
+  renderer,table_slice,args=job
+  return ''.join(renderer._render_rows(table_slice,*args,0))
+
+def _render_rows_from(renderer,table,args,start,parallel,parallel_pool):
+  """
+  Render rows starting at start with renderer._render_rows(), spreading the
+  work over a pool of parallel workers when asked to and there are enough rows.
+  Rows only depend on themselves and the (already known) column layout, so
+  runs of rows are rendered independently and written out in the original
+  order.
+
+  Args:
+    renderer:       Renderer object providing _render_rows()
+    table:          The table object containing table metadata
+    args:           Tuple of the args for renderer._render_rows() coming
+                    between table and start
+    start:          Index of the first row to render
+    parallel:       Number of workers, None or 1 to render in this process
+    parallel_pool:  'process' or 'thread'
+
+  Returns:
+    Generator of Strings
+  """
+  row_count=len(table.rows)-start
+  if not parallel or parallel < 2 or row_count < renderer.parallel_min_rows:
+    return renderer._render_rows(table,*args,start)
+  return _parallel_row_chunks(renderer,table,args,start,parallel,parallel_pool,row_count)
+
+def _parallel_row_chunks(renderer,table,args,start,parallel,parallel_pool,row_count):
+  """
+  Does the work for _render_rows_from() when rendering in a pool
+  """
+  from concurrent import futures
+  if parallel_pool == 'thread':
+    pool=futures.ThreadPoolExecutor(max_workers=parallel)
+  elif parallel_pool == 'process':
+    pool=futures.ProcessPoolExecutor(max_workers=parallel)
+  else:
+    raise ValueError("parallel_pool must be 'process' or 'thread', not: %s" % (parallel_pool))
+  #A few jobs per worker evens out rows that are slower than others
+  job_rows=max(-(-row_count // (parallel*4)),1000)
+  rows=_iter_from(table.rows,start)
+  colorization=_iter_from(table.row_colorization,start)
+  render_opts=_iter_from(table.row_render_opts,start)
+  pending=deque()
+  try:
+    while True:
+      #Keep only a couple of jobs per worker in flight, so the whole table isn't copied up front
+      while len(pending) < parallel*2:
+        job_slice=_TableSlice(table,list(islice(rows,job_rows)),list(islice(colorization,job_rows)),list(islice(render_opts,job_rows)))
+        if not job_slice.rows:
+          break
+        pending.append(pool.submit(_render_slice,(renderer,job_slice,args)))
+      if not pending:
+        break
+      yield pending.popleft().result()
+  finally:
+    for f in pending:
+      f.cancel()
+    pool.shutdown()
 
 class RenderText:
   """
@@ -224,14 +564,21 @@ class RenderText:
     h_border_char:      Character for horiz. border (Default='-')
     v_border_char:      Character for vert. border (Default='|')
     col_sep_char:       Character for cell separator (Default='|')
+    row_cache:          Keep the rendered rows with the table, so rendering
+                        it again only renders rows added since (Default=False)
+    parallel:           Number of worker processes/threads to render rows
+                        with. None renders in the calling process (Default=None)
+    parallel_pool:      'process' or 'thread' pool for parallel (Default='process')
   """
   type_spec='text'
+  def_chunk_rows=1000
   def_padding=0
   def_padding_char=' '
   def_horz_border_char='-'
   def_vert_border_char='|'
   def_fill_char=' '
   def_sep_char='|'
+  parallel_min_rows=10000 #Tables smaller than this aren't worth starting a pool for
   txt_color_attr_dict={ 'black': '\033[30m',
                'blue': '\033[94m',
                'green': '\033[92m',
@@ -251,7 +598,7 @@ class RenderText:
                'underline': '\033[4m',
                'blink': '\033[5m',
               }
-  def __init__(self,indent=0,borderless=False,color_disabled=False,padding=def_padding,padding_char=def_padding_char,fill_char=def_fill_char,h_border_char=def_horz_border_char,v_border_char=def_vert_border_char,col_sep_char=def_sep_char):
+  def __init__(self,indent=0,borderless=False,color_disabled=False,padding=def_padding,padding_char=def_padding_char,fill_char=def_fill_char,h_border_char=def_horz_border_char,v_border_char=def_vert_border_char,col_sep_char=def_sep_char,row_cache=False,parallel=None,parallel_pool='process'):
     self.render_opts=dict()
     self.render_opts['indent']=indent
     self.render_opts['borderless']=borderless
@@ -262,6 +609,9 @@ class RenderText:
     self.render_opts['v_border_char']=v_border_char
     self.render_opts['col_sep_char']=col_sep_char
     self.render_opts['color_disabled']=color_disabled
+    self.render_opts['row_cache']=row_cache
+    self.render_opts['parallel']=parallel
+    self.render_opts['parallel_pool']=parallel_pool
     if self.render_opts['borderless']:
       self.render_opts['h_border_char']=''
       self.render_opts['v_border_char']=''
@@ -310,6 +660,50 @@ class RenderText:
         color_dict['end'].append('')
         count+=1
     return color_dict
+  def _layout_plan(self,table,indent_str=''):
+    """
+    Work out the layout of a row once (widths, truncation, padding, borders
+    and separators) and turn it into format templates, so rendering a row is
+    a single str.format call instead of a loop over the cells.
+
+    Args:
+      table:      The table object containing table metadata
+      indent_str: String that is prepended to each row
+
+    Returns:
+      Tuple of (template for rows without colors, template for rows with
+      colors), or None if rows can't be rendered with a template. The color
+      template takes the cells, then the color start strings and then the
+      color end strings.
+    """
+    fill_char=self.render_opts['fill_char']
+    if len(fill_char) != 1 or fill_char in '{}':
+      return None
+    col_count=table.col_count
+    if len(table.col_widths_real) < col_count:
+      return None
+    esc=lambda t: t.replace('{','{{').replace('}','}}')
+    pad=esc(''.ljust(self.render_opts['padding'],self.render_opts['padding_char']))
+    plain=[esc(indent_str+self.render_opts['v_border_char'])]
+    colored=list(plain)
+    col_widths_set_count=len(table.col_widths)
+    for i in range(col_count):
+      if i < col_widths_set_count and table.col_widths[i] > 0:
+        #Static width, so truncate and fill
+        spec=':%s<%d.%d' % (fill_char,table.col_widths[i],table.col_widths[i])
+      elif table.col_widths_real[i] > 0:
+        spec=':%s<%d' % (fill_char,table.col_widths_real[i])
+      else:
+        spec=''
+      if i == col_count-1:
+        sep=esc(self.render_opts['v_border_char'])
+      else:
+        sep=esc(self.render_opts['col_sep_char'])
+      plain.append('%s{%d%s}%s%s' % (pad,i,spec,pad,sep))
+      colored.append('%s{%d}{%d%s}{%d}%s%s' % (pad,col_count+i,i,spec,2*col_count+i,pad,sep))
+    plain.append('\n')
+    colored.append('\n')
+    return (''.join(plain),''.join(colored))
   def copy(self):
     """
     Create a copy of the current object
@@ -380,12 +774,12 @@ class RenderText:
     cells_count=len(cells)
     cur_count=0
     built.append(indent_str+self.render_opts['v_border_char'])
+    if colors:
+      color_dict=self._colorize_row(cells,colors)
+    else:
+      color_dict=False
     while cur_count < cells_count:
       built.append(''.ljust(self.render_opts['padding'],self.render_opts['padding_char'])) #Pad beginning of cell
-      if colors:
-        color_dict=self._colorize_row(cells,colors)
-      else:
-        color_dict=False
       if cur_count < col_widths_set_count:
         #See if there are set col widths
         if table.col_widths[cur_count] > 0:
@@ -412,33 +806,76 @@ class RenderText:
         built.append(self.render_opts['col_sep_char'])
     built.append('\n')
     return ''.join(built)
-  def print_rows(self,table,indent_str=''):
+  def iter_rows(self,table,indent_str='',chunk_rows=def_chunk_rows,start=0):
     """
-    Render all rows currently in the table object passed
+    Render all rows currently in the table object passed, in chunks
     
     Args:
       table:      The table object containing table metadata
       indent_str: String that is prepended to the header
+      chunk_rows: Number of rows to render per chunk. Default=1000
+      start:      Index of the first row to render. Default=0
 
     Returns:
-      String
+      Generator of Strings
+    """
+    if self.render_opts['row_cache'] and not start:
+      #Rows only depend on the layout, so that is what the cache is keyed on
+      key=('text',indent_str,tuple(sorted(self.render_opts.items())),tuple(table.col_widths),tuple(table.col_widths_real),table.col_count)
+      return table._cached_row_chunks(key,lambda first: self._rows_from(table,indent_str,chunk_rows,first))
+    return self._rows_from(table,indent_str,chunk_rows,start)
+  def _rows_from(self,table,indent_str,chunk_rows,start):
+    """
+    Renders rows from start on, in parallel when the renderer is set up to
+    """
+    return _render_rows_from(self,table,(indent_str,chunk_rows),start,self.render_opts['parallel'],self.render_opts['parallel_pool'])
+  def _render_rows(self,table,indent_str,chunk_rows,start):
+    """
+    Does the work for iter_rows, without the row cache
     """
     #Print all rows currently added to the object via add_row().
     built=[]
-    row_count=0
-    for r in table.rows:
-      c_count=len(r)
-      if c_count < table.col_count:
-        count=c_count
-        while count != table.col_count:
-          r.append('')
-          count+=1
-      if self.render_opts['color_disabled']:
-         built.append(self.print_row(table,r,adhoc=False,indent_str=indent_str))
+    color_disabled=self.render_opts['color_disabled']
+    col_count=table.col_count
+    plan=self._layout_plan(table,indent_str)
+    if plan:
+      fmt_plain=plan[0].format
+      fmt_colored=plan[1].format
+    color_cache=dict()
+    for r,colors in zip(_iter_from(table.rows,start),_iter_from(table.row_colorization,start)):
+      r=_pad_row(r,col_count)
+      if not plan or len(r) != col_count:
+        if color_disabled:
+          built.append(self.print_row(table,r,adhoc=False,indent_str=indent_str))
+        else:
+          built.append(self.print_row(table,r,colors,adhoc=False,indent_str=indent_str))
+      elif color_disabled or not colors:
+        built.append(fmt_plain(*r))
       else:
-        built.append(self.print_row(table,r,table.row_colorization[row_count],adhoc=False,indent_str=indent_str))
-      row_count+=1
-    return ''.join(built)
+        key=tuple(colors)
+        wrap=color_cache.get(key)
+        if wrap is None:
+          color_dict=self._colorize_row(['']*col_count,colors)
+          wrap=tuple(color_dict['start'])+tuple(color_dict['end'])
+          color_cache[key]=wrap
+        built.append(fmt_colored(*r,*wrap))
+      if len(built) >= chunk_rows:
+        yield ''.join(built)
+        built=[]
+    if built:
+      yield ''.join(built)
+  def print_rows(self,table,indent_str=''):
+    """
+    Render all rows currently in the table object passed
+    
+    Args:
+      table:      The table object containing table metadata
+      indent_str: String that is prepended to the header
+
+    Returns:
+      String
+    """
+    return ''.join(self.iter_rows(table,indent_str))
   def print_footer(self,table,indent_str=''):
     """
     Render's the footer of the table
@@ -455,33 +892,44 @@ class RenderText:
     if self.render_opts['h_border_char']:
       built.append(indent_str+''.ljust(border_width,self.render_opts['h_border_char']) + '\n')
     return ''.join(built)
-  def print_table(self,table,indent=0):
+  def iter_table(self,table,chunk_rows=def_chunk_rows):
     """
-    Render the full table
+    Render the full table in chunks: the header, batches of chunk_rows rows
+    and then the footer
     
     Args:
-      table:    The table object where the table metadata is located
-      indent:   Number of chars to indent table when rendering. Default=0
+      table:      The table object where the table metadata is located
+      chunk_rows: Number of rows to render per chunk. Default=1000
 
     Returns:
-      String
+      Generator of Strings
     """
-    built=[]
     #Check and indent table as needed
     if self.render_opts['indent'] > 0:
       indent_str=self._indent_lvl(self.render_opts['indent'])
     else:
       indent_str=''
-    header=self.print_header(table=table,indent_str=indent_str)
-    rows=self.print_rows(table=table,indent_str=indent_str)
-    footer=self.print_footer(table=table,indent_str=indent_str)
+    print_header,iter_rows,print_footer=_render_phases(self,table)
+    header=print_header(table=table,indent_str=indent_str)
     if header:
-      built.append(header)
-    if rows:
-      built.append(rows)
+      yield header
+    for rows in iter_rows(table=table,indent_str=indent_str,chunk_rows=chunk_rows):
+      yield rows
+    footer=print_footer(table=table,indent_str=indent_str)
     if footer:
-      built.append(footer)
-    return ''.join(built)
+      yield footer
+  def print_table(self,table,indent=0):
+    """
+    Render the full table
+    
+    Args:
+      table:    The table object where the table metadata is located
+      indent:   Number of chars to indent table when rendering. Default=0
+
+    Returns:
+      String
+    """
+    return ''.join(self.iter_table(table))
 
 class RenderCSV:
   """
@@ -489,11 +937,48 @@ class RenderCSV:
   
   Args:
     sep_char:   Separator charactor. Default=','
+    row_cache:  Keep the rendered rows with the table, so rendering it again
+                only renders rows added since. Default=False
+    parallel:   Number of worker processes/threads to render rows with. None
+                renders in the calling process. Default=None
+    parallel_pool: 'process' or 'thread' pool for parallel. Default='process'
+    csv_writer: Render with the standard library csv writer, which quotes
+                cells holding separators, quotes or newlines, and is a lot
+                faster on big tables. Default=False
+    dialect:    csv dialect for csv_writer (sep_char still sets the
+                delimiter). Default='excel'
+    quoting:    csv quoting for csv_writer, e.g. csv.QUOTE_ALL. Default=None
+                (the dialect's, which is csv.QUOTE_MINIMAL for 'excel')
+    lineterminator: Line ending for csv_writer. Default='\\n'
   """
   type_spec='csv'
+  def_chunk_rows=1000
   def_sep_char=','
-  def __init__(self,sep_char=def_sep_char):
+  parallel_min_rows=10000 #Tables smaller than this aren't worth starting a pool for
+  def __init__(self,sep_char=def_sep_char,row_cache=False,parallel=None,parallel_pool='process',csv_writer=False,dialect='excel',quoting=None,lineterminator='\n'):
     self.sep_char=sep_char
+    self.row_cache=row_cache
+    self.parallel=parallel
+    self.parallel_pool=parallel_pool
+    self.csv_writer=csv_writer
+    self.dialect=dialect
+    self.quoting=quoting
+    self.lineterminator=lineterminator
+  def _new_csv_writer(self,output):
+    """
+    Create a csv writer set up with this renderer's options
+
+    Args:
+      output:   File like object for the writer to write to
+
+    Returns:
+      csv writer
+    """
+    import csv
+    fmtparams={'delimiter': self.sep_char, 'lineterminator': self.lineterminator}
+    if self.quoting is not None:
+      fmtparams['quoting']=self.quoting
+    return csv.writer(output,self.dialect,**fmtparams)
   def copy(self):
     """
     Create a copy of the current object
@@ -503,6 +988,13 @@ class RenderCSV:
     """
     new_renderer=RenderCSV()
     new_renderer.sep_char=str(self.sep_char)
+    new_renderer.row_cache=self.row_cache
+    new_renderer.parallel=self.parallel
+    new_renderer.parallel_pool=self.parallel_pool
+    new_renderer.csv_writer=self.csv_writer
+    new_renderer.dialect=self.dialect
+    new_renderer.quoting=self.quoting
+    new_renderer.lineterminator=self.lineterminator
     return new_renderer
   def print_header(self,table):
     """
@@ -540,6 +1032,13 @@ class RenderCSV:
     Returns:
       String
     """
+    if self.csv_writer:
+      cells=_pad_row(cells,table.col_count)
+      if adhoc:
+        table._row_col_width_adjust(cells)
+      buf=io.StringIO()
+      self._new_csv_writer(buf).writerow(cells)
+      return buf.getvalue()
     built=[]
     if adhoc:
       #Adhoc rows are rows not in table.rows so we need to make sure col widths and counts are correct
@@ -558,6 +1057,105 @@ class RenderCSV:
       else:
         built.append('\n')
     return ''.join(built)
+  def iter_rows(self,table,chunk_rows=def_chunk_rows,start=0):
+    """
+    Render all rows currently in the table object passed, in chunks
+    
+    Args:
+      table:      The table object containing table metadata
+      chunk_rows: Number of rows to render per chunk. Default=1000
+      start:      Index of the first row to render. Default=0
+
+    Returns:
+      Generator of Strings
+    """
+    if self.row_cache and not start:
+      key=('csv',self.sep_char,table.col_count,self.csv_writer,self.dialect,self.quoting,self.lineterminator)
+      return table._cached_row_chunks(key,lambda first: self._rows_from(table,chunk_rows,first))
+    return self._rows_from(table,chunk_rows,start)
+  def _rows_from(self,table,chunk_rows,start):
+    """
+    Renders rows from start on, in parallel when the renderer is set up to
+    """
+    return _render_rows_from(self,table,(chunk_rows,),start,self.parallel,self.parallel_pool)
+  def _render_rows(self,table,chunk_rows,start):
+    """
+    Does the work for iter_rows, without the row cache
+    """
+    if self.csv_writer:
+      return self._write_rows(table,chunk_rows,start)
+    return self._join_rows(table,chunk_rows,start)
+  def _write_rows(self,table,chunk_rows,start):
+    """
+    Renders rows in chunks with a csv writer, the row loop runs in C
+    """
+    buf=io.StringIO()
+    writer=self._new_csv_writer(buf)
+    rows=_iter_from(table.rows,start)
+    col_count=table.col_count
+    while True:
+      chunk=list(islice(rows,chunk_rows))
+      if not chunk:
+        break
+      if min(map(len,chunk)) < col_count:
+        chunk=list(map(_pad_row,chunk,repeat(col_count)))
+      writer.writerows(chunk)
+      yield buf.getvalue()
+      buf.seek(0)
+      buf.truncate()
+  def write_table(self,table,output):
+    """
+    Write the full table straight to a file like object. Only done when
+    rendering with csv_writer (and without row_cache or parallel), as the
+    csv writer can then go over all the rows in one writerows call.
+
+    Args:
+      table:    The table object where the table metadata is located
+      output:   File like object with a 'write' method
+
+    Returns:
+      True if the table was written, False if it has to be rendered with
+      iter_table instead
+    """
+    if not self.csv_writer or self.row_cache or (self.parallel and self.parallel > 1):
+      return False
+    write=output.write
+    write_rows=self._new_csv_writer(output).writerows
+    stats=table._stats
+    if stats is not None:
+      #The csv writer formats and writes each row in one go, so the time is
+      # recorded as both print_rows and _output, which every other render
+      # reports
+      write=stats.wrap('_output',write)
+      writerows=write_rows
+      def write_rows(rows):
+        start=perf_counter()
+        try:
+          writerows(rows)
+        finally:
+          seconds=perf_counter()-start
+          stats.add('print_rows',seconds)
+          stats.add('_output',seconds)
+    write(_render_phases(self,table)[0](table))
+    col_count=table.col_count
+    rows=table.rows
+    if len(rows) and min(map(len,rows)) < col_count:
+      rows=map(_pad_row,rows,repeat(col_count))
+    write_rows(rows)
+    return True
+  def _join_rows(self,table,chunk_rows,start):
+    """
+    Renders rows in chunks joining the cells with sep_char
+    """
+    built=[]
+    for r in _iter_from(table.rows,start):
+      r=_pad_row(r,table.col_count)
+      built.append(self.print_row(table,r,adhoc=False))
+      if len(built) >= chunk_rows:
+        yield ''.join(built)
+        built=[]
+    if built:
+      yield ''.join(built)
   def print_rows(self,table):
     """
     Render all rows currently in the table object passed
@@ -568,16 +1166,25 @@ class RenderCSV:
     Returns:
       String
     """
-    built=[]
-    for r in table.rows:
-      c_count=len(r)
-      if c_count < table.col_count:
-        count=c_count
-        while count != table.col_count:
-          r.append('')
-          count+=1
-      built.append(self.print_row(table,r,adhoc=False))
-    return ''.join(built)
+    return ''.join(self.iter_rows(table))
+  def iter_table(self,table,chunk_rows=def_chunk_rows):
+    """
+    Render the full table in chunks: the header and then batches of
+    chunk_rows rows
+    
+    Args:
+      table:      The table object where the table metadata is located
+      chunk_rows: Number of rows to render per chunk. Default=1000
+
+    Returns:
+      Generator of Strings
+    """
+    print_header,iter_rows,print_footer=_render_phases(self,table)
+    header=print_header(table)
+    if header:
+      yield header
+    for rows in iter_rows(table,chunk_rows=chunk_rows):
+      yield rows
   def print_table(self,table):
     """
     Render the full table
@@ -588,10 +1195,7 @@ class RenderCSV:
     Returns:
       String
     """
-    built=[]
-    built.append(self.print_header(table))
-    built.append(self.print_rows(table))
-    return ''.join(built)
+    return ''.join(self.iter_table(table))
 
 class RenderHTML:
   """
@@ -608,14 +1212,24 @@ class RenderHTML:
     table_attr:         Optional attribute to add into <table> tag
     thead_attr:         Optional attribute to add into <thead> tag
     tbody_attr:         Optional attribute to add into <tbody> tag
+    row_cache:          Keep the rendered rows with the table, so rendering
+                        it again only renders rows added since (Default=False)
+    parallel:           Number of worker processes/threads to render rows
+                        with. None renders in the calling process (Default=None)
+    parallel_pool:      'process' or 'thread' pool for parallel (Default='process')
   """
   type_spec='html'
+  def_chunk_rows=1000
   def_borderless=False
   def_border=1
   def_padding=1
   def_color_disabled=False
-  def __init__(self,color_disabled=def_color_disabled,table_attr='',thead_attr='',tbody_attr=''):
+  parallel_min_rows=10000 #Tables smaller than this aren't worth starting a pool for
+  def __init__(self,color_disabled=def_color_disabled,table_attr='',thead_attr='',tbody_attr='',row_cache=False,parallel=None,parallel_pool='process'):
     self.color_disabled=color_disabled
+    self.row_cache=row_cache
+    self.parallel=parallel
+    self.parallel_pool=parallel_pool
     self.body_tag_rendered=False
     self.table_attr=table_attr
     self.thead_attr=thead_attr
@@ -663,7 +1277,7 @@ class RenderHTML:
     Returns:
       RenderHTML
     """
-    new_renderer=RenderHTML()
+    new_renderer=RenderHTML(self.color_disabled,self.table_attr,self.thead_attr,self.tbody_attr,self.row_cache,self.parallel,self.parallel_pool)
     return new_renderer
   def print_header(self,table):
     """
@@ -720,7 +1334,7 @@ class RenderHTML:
     if adhoc:
       #Adhoc rows are rows not in self.rows so we need to make sure col widths and counts are correct
       tmp_count=len(cells)
-      while tmp_count < self.col_count:
+      while tmp_count < table.col_count:
         cells.append('')
         tmp_count+=1
       table._row_col_width_adjust(cells)
@@ -769,33 +1383,79 @@ class RenderHTML:
       if cur_count >= cells_count:
         built.append('\n    </tr>\n')
     return ''.join(built)
-  def print_rows(self,table):
+  def iter_rows(self,table,chunk_rows=def_chunk_rows,start=0):
     """
-    Render all rows currently in the table object passed
+    Render all rows currently in the table object passed, in chunks
     
     Args:
       table:      The table object containing table metadata
+      chunk_rows: Number of rows to render per chunk. Default=1000
+      start:      Index of the first row to render. Default=0
 
     Returns:
-      String
+      Generator of Strings
+    """
+    yield '  <tbody %s>\n' % (self.tbody_attr)
+    if self.row_cache and not start:
+      key=('html',self.color_disabled,table.col_count)
+      chunks=table._cached_row_chunks(key,lambda first: self._rows_from(table,chunk_rows,first))
+    else:
+      chunks=self._rows_from(table,chunk_rows,start)
+    for chunk in chunks:
+      yield chunk
+    yield '  </tbody>\n'
+  def _rows_from(self,table,chunk_rows,start):
+    """
+    Renders rows from start on, in parallel when the renderer is set up to
+    """
+    return _render_rows_from(self,table,(chunk_rows,),start,self.parallel,self.parallel_pool)
+  def _render_rows(self,table,chunk_rows,start):
+    """
+    Does the work for iter_rows, without the row cache
     """
     built=[]
-    row_count=0
-    built.append('  <tbody %s>\n' % (self.tbody_attr))
-    for r in table.rows:
-      c_count=len(r)
-      if c_count < table.col_count:
-        count=c_count
-        while count != table.col_count:
-          r.append('')
-          count+=1
+    rows=_iter_from(table.rows,start)
+    colorization=_iter_from(table.row_colorization,start)
+    render_opts=_iter_from(table.row_render_opts,start)
+    for r,colors,attrs in zip(rows,colorization,render_opts):
+      r=_pad_row(r,table.col_count)
       if self.color_disabled:
-        built.append(self.print_row(table,r,attrs=table.row_render_opts[row_count],adhoc=False))
+        built.append(self.print_row(table,r,attrs=attrs,adhoc=False))
       else:
-        built.append(self.print_row(table,r,colors=table.row_colorization[row_count],attrs=table.row_render_opts[row_count],adhoc=False))
-      row_count+=1
-    built.append('  </tbody>\n')
-    return ''.join(built)
+        built.append(self.print_row(table,r,colors=colors,attrs=attrs,adhoc=False))
+      if len(built) >= chunk_rows:
+        yield ''.join(built)
+        built=[]
+    if built:
+      yield ''.join(built)
+  def print_rows(self,table):
+    """
+    Render all rows currently in the table object passed
+    
+    Args:
+      table:      The table object containing table metadata
+
+    Returns:
+      String
+    """
+    return ''.join(self.iter_rows(table))
+  def iter_table(self,table,chunk_rows=def_chunk_rows):
+    """
+    Render the full table in chunks: the opening tag and header, batches of
+    chunk_rows rows and then the closing tag
+    
+    Args:
+      table:      The table object where the table metadata is located
+      chunk_rows: Number of rows to render per chunk. Default=1000
+
+    Returns:
+      Generator of Strings
+    """
+    print_header,iter_rows,print_footer=_render_phases(self,table)
+    yield "<table %s>\n" % (self.table_attr) + print_header(table)
+    for rows in iter_rows(table,chunk_rows=chunk_rows):
+      yield rows
+    yield "</table>\n"
   def print_table(self,table):
     """
     Render the full table
@@ -806,86 +1466,1647 @@ class RenderHTML:
     Returns:
       String
     """
-    built=[]
-    built.append("<table %s>\n" % (self.table_attr) )
-    built.append(self.print_header(table))
-    built.append(self.print_rows(table))
-    built.append("</table>\n")
-    return ''.join(built)
+    return ''.join(self.iter_table(table))
 
-class Table:
+class OutputSink(ABC):
   """
-  The table class. This contains rows, and metadata such as colum counts/size
-  etc...
-  
+  Base class for the outputs a Table writes to. Writes are collected and
+  handed to _write_out in batches, once flush_size characters are pending or
+  flush() is called. Subclasses only have to provide _write_out, this class
+  can't be used on its own.
+
   Args:
-    renderer:      Render oject which is how to render the table data
-    output:        A file like object to write data to, This can also be the
-                   key word 'String' to write to the internal string:
-                     built_buffer. Default=sys.stdout
-    table_filter:  TableFilter object, to filter data as they are added
-                   to the table
+    flush_size: Number of pending characters that triggers a flush. A
+                flush_size of 0 writes everything straight through.
+                Default=65536
   """
-  col_count=0 #Number of columns the table currently has
-  data_cur_max_width=0 #This holds the max chars without any truncation etc..
-  data_max_width=0 #This holds what will be the max chars taking into account truncation from static set col widths
-  def_padding=0 #Amount of padding to add to the sides of cells
-  def __init__(self,renderer=RenderText(),output=sys.stdout,table_filter=None):
-    self._output_file=''
-    self.built_buffer=''
-    self.col_widths=[] #List of column widths that have been passed in and will truncate or have space if values don't fit
-    self.col_widths_real=[] #List of column widths that are a max width per column
-    self.col_names=[] #List of names of the columns, used mostly for the header
-    self.rows=[]
-    self.row_colorization=[]
-    self.row_render_opts=[]
-    #Check that the output passed is a file like object:
-    try:
-      if (output != "String"):
-        getattr(output,'write')
-        self._output_file=output
-    except NameError:
-      raise NameError("Name passed as Table output is invalid. Is sys module imported?")
-    except AttributeError:
-      raise AttributeError("Output object passed is not a 'File Like' object with a 'write' method")
-    self.set_table_renderer(renderer)
-    if table_filter:
-      #Check that the table filter passed is a valid TableFilter object
-      try:
-        getattr(table_filter,'filter_table')
-        self.table_filter=table_filter
-      except AttributeError:
-        AttributeError("TableFilter passed is not a valid TableFilter")
-    else:
-      self.table_filter=None
-  def __str__(self):
-    """
-    Converts the table to a string object using the supplied renderer
-    
-    Returns:
-      String
+  def_flush_size=65536
+  def __init__(self,flush_size=def_flush_size):
+    self.flush_size=flush_size
+    self._pending=[]
+    self._pending_size=0
+  @abstractmethod
+  def _write_out(self,chunks):
     """
-    return self.renderer.print_table(self)
-  def __len__(self):
+    Write a list of strings to the destination of the sink
     """
-    Converts the table representation to a specified length, which
-    is the number of rows currently added to the table.
-    
-    Returns:
-      String
+  def write(self,data):
     """
+    Write a string to the sink
+
+    Args:
+      data:     String to write
+    """
+    if not self.flush_size:
+      self._write_out([data])
+      return
+    self._pending.append(data)
+    self._pending_size+=len(data)
+    if self._pending_size >= self.flush_size:
+      self.flush()
+  def flush(self):
+    """
+    Write out anything that is pending
+    """
+    if self._pending:
+      pending=self._pending
+      self._pending=[]
+      self._pending_size=0
+      self._write_out(pending)
+
+class StringSink(OutputSink):
+  """
+  An in memory sink backed by io.StringIO. This is what is used for Tables
+  created with output='String', and is what built_buffer reads from.
+
+  Args:
+    flush_size: Number of pending characters that are joined before being
+                written to the StringIO. Default=65536
+  """
+  def __init__(self,flush_size=OutputSink.def_flush_size):
+    OutputSink.__init__(self,flush_size)
+    self._buffer=io.StringIO()
+  def _write_out(self,chunks):
+    self._buffer.write(''.join(chunks))
+  def getvalue(self):
+    """
+    Returns:
+      String, everything written to the sink since it was last cleared
+    """
+    self.flush()
+    return self._buffer.getvalue()
+  def clear(self):
+    """
+    Throw away everything written to the sink
+    """
+    self._pending=[]
+    self._pending_size=0
+    self._buffer=io.StringIO()
+
+class FileSink(OutputSink):
+  """
+  A buffered sink for a file like object. Pending writes are handed to the
+  file's writelines in one call per flush.
+
+  Args:
+    output:     File like object with a 'write' method
+    flush_size: Number of pending characters that triggers a flush. A
+                flush_size of 0 writes everything straight through.
+                Default=65536
+  """
+  def __init__(self,output,flush_size=OutputSink.def_flush_size):
+    OutputSink.__init__(self,flush_size)
+    self.output=output
+  def _write_out(self,chunks):
+    if len(chunks) == 1:
+      self.output.write(chunks[0])
+    else:
+      self.output.writelines(chunks)
+
+class BytesSink(OutputSink):
+  """
+  A buffered sink for a binary file like object. Pending writes are joined
+  and encoded once per flush.
+
+  Args:
+    output:     Binary file like object with a 'write' method
+    encoding:   Encoding used for the rendered text. Default='utf-8'
+    flush_size: Number of pending characters that triggers a flush. A
+                flush_size of 0 encodes and writes every write straight
+                through. Default=65536
+  """
+  def __init__(self,output,encoding='utf-8',flush_size=OutputSink.def_flush_size):
+    OutputSink.__init__(self,flush_size)
+    self.output=output
+    self.encoding=encoding
+  def _write_out(self,chunks):
+    self.output.write(''.join(chunks).encode(self.encoding))
+
+class TableStats:
+  """
+  Counters and cumulative timings for the phases of building and rendering
+  a Table, see Table.enable_stats(). Timings nest, so add_row includes the
+  time of the _check_row and _row_col_width_adjust calls it makes. Counters
+  are updated under a lock, as concurrent tables add rows from many threads.
+
+  Args:
+    hook:   Function called with (phase,seconds) after every timed call.
+            Default=None
+  """
+  def __init__(self,hook=None):
+    import threading
+    self.hook=hook
+    self.phases=dict() #Phase name to [calls, seconds]
+    self._lock=threading.Lock()
+  def add(self,phase,seconds):
+    """
+    Record a call to a phase
+
+    Args:
+      phase:    Name of the phase
+      seconds:  Time the call took
+    """
+    with self._lock:
+      counter=self.phases.get(phase)
+      if counter is None:
+        counter=self.phases[phase]=[0,0.0]
+      counter[0]+=1
+      counter[1]+=seconds
+    if self.hook:
+      self.hook(phase,seconds)
+  def wrap(self,phase,func):
+    """
+    Returns func timed as phase
+    """
+    add=self.add
+    def timed(*args,**kwargs):
+      start=perf_counter()
+      try:
+        return func(*args,**kwargs)
+      finally:
+        add(phase,perf_counter()-start)
+    return timed
+  def wrap_chunks(self,phase,func):
+    """
+    Returns func, a function returning an iterator, with the time taken to
+    produce each item timed as phase
+    """
+    add=self.add
+    def timed(*args,**kwargs):
+      start=perf_counter()
+      chunks=iter(func(*args,**kwargs))
+      while True:
+        try:
+          chunk=next(chunks)
+        except StopIteration:
+          add(phase,perf_counter()-start)
+          return
+        add(phase,perf_counter()-start)
+        yield chunk
+        start=perf_counter()
+    return timed
+  def as_dict(self):
+    """
+    Returns:
+      Dictionary of phase name to a dictionary with calls and seconds
+    """
+    with self._lock:
+      return dict((phase,{'calls': calls, 'seconds': seconds}) for phase,(calls,seconds) in self.phases.items())
+  def reset(self):
+    """
+    Zero all counters
+    """
+    with self._lock:
+      self.phases.clear()
+
+class _TimedFilter:
+  """
+  Stands in for the TableFilter of a Table with stats enabled, timing its row
+  rules as the _check_row phase. The filter itself is left alone, as it can
+  be shared with other tables.
+  """
+  def __init__(self,table_filter,stats):
+    self._table_filter=table_filter
+    self._stats=stats
+    self._timed=(None,None) #Row predicate and its timed version
+  def __getattr__(self,name):
+    return getattr(self._table_filter,name)
+  def _row_predicate(self):
+    predicate=self._table_filter._row_predicate()
+    if self._timed[0] is not predicate:
+      self._timed=(predicate,self._stats.wrap('_check_row',predicate))
+    return self._timed[1]
+
+def _copy_array(typecode,values):
+  """
+  Copy an array, or a memoryview cast to the same typecode, into a new array
+
+  Args:
+    typecode:   Array typecode
+    values:     Array or memoryview to copy
+
+  Returns:
+    array
+  """
+  new_array=array(typecode)
+  new_array.frombytes(memoryview(values).cast('B'))
+  return new_array
+
+class _StrColumn:
+  """
+  A column of strings held as a single utf-8 encoded blob, plus an array of
+  offsets marking where each cell ends in the blob. Columns loaded by
+  Table.load() hold memoryviews into the snapshot file instead, until own()
+  is called.
+  """
+  kind='str'
+  def __init__(self,values=()):
+    self.offsets=array('Q',[0])
+    self.blob=bytearray()
+    for v in values:
+      self.append(v)
+  def __len__(self):
+    return len(self.offsets)-1
+  def __getitem__(self,i):
+    if i < 0:
+      i+=len(self)
+    if i < 0 or i >= len(self):
+      raise IndexError('column index out of range')
+    return str(self.blob[self.offsets[i]:self.offsets[i+1]],'utf-8')
+  def __iter__(self):
+    return self.iter_from(0)
+  def iter_from(self,first):
+    blob=self.blob
+    start=self.offsets[first]
+    for end in self.offsets[first+1:]:
+      yield str(blob[start:end],'utf-8')
+      start=end
+  def append(self,value):
+    """
+    Append a cell to the column. Strings always fit.
+
+    Returns:
+      True
+    """
+    if value.__class__ is not str:
+      value=str(value)
+    self.blob+=value.encode('utf-8')
+    self.offsets.append(len(self.blob))
+    return True
+  def extend(self,values):
+    """
+    Append a list of cells to the column
+
+    Returns:
+      True
+    """
+    try:
+      joined=''.join(values)
+    except TypeError:
+      values=list(map(str,values))
+      joined=''.join(values)
+    encoded=joined.encode('utf-8')
+    if len(encoded) == len(joined):
+      #All ascii, so character counts are byte counts
+      lens=map(len,values)
+    else:
+      lens=[len(v.encode('utf-8')) for v in values]
+    ends=accumulate(lens,initial=len(self.blob))
+    next(ends)
+    self.offsets.extend(ends)
+    self.blob+=encoded
+    return True
+  def fill_empty(self,count):
+    """
+    Append count empty cells to the column
+    """
+    self.offsets.extend(array('Q',[len(self.blob)])*count)
+  def own(self):
+    """
+    Copy a column loaded from a snapshot file into memory, so it can be
+    appended to
+    """
+    if self.offsets.__class__ is not array:
+      self.offsets=_copy_array('Q',self.offsets)
+      self.blob=bytearray(self.blob)
+  def copy(self):
+    new_col=_StrColumn()
+    new_col.offsets=_copy_array('Q',self.offsets)
+    new_col.blob=bytearray(self.blob)
+    return new_col
+  def take(self,positions,np):
+    """
+    Gather the cells at positions into a new column with NumPy, copying the
+    bytes of all the cells in one go
+
+    Args:
+      positions:  NumPy int64 array of row positions
+      np:         The numpy module
+
+    Returns:
+      Tuple of (new column, width of the widest cell in characters)
+    """
+    offsets=np.frombuffer(self.offsets,dtype=np.uint64).astype(np.int64)
+    starts=offsets[positions]
+    lens=offsets[positions+1]-starts
+    new_offsets=np.zeros(len(positions)+1,dtype=np.int64)
+    np.cumsum(lens,out=new_offsets[1:])
+    total=int(new_offsets[-1])
+    new_col=_StrColumn()
+    new_col.offsets=_copy_array('Q',new_offsets.astype(np.uint64))
+    if not total:
+      return new_col,0
+    blob=np.frombuffer(self.blob,dtype=np.uint8)
+    new_blob=blob[np.repeat(starts-new_offsets[:-1],lens)+np.arange(total,dtype=np.int64)]
+    new_col.blob=bytearray(new_blob.tobytes())
+    if new_blob.max() < 0x80:
+      return new_col,int(lens.max())
+    #Count characters rather than bytes: every byte but utf-8 continuation bytes
+    chars=np.zeros(total+1,dtype=np.int64)
+    np.cumsum((new_blob & 0xC0) != 0x80,out=chars[1:])
+    return new_col,int((chars[new_offsets[1:]]-chars[new_offsets[:-1]]).max())
+
+class _NumColumn:
+  """
+  A column of numbers held in an array.array. Only cells whose string form
+  survives a round trip through the number type (e.g. '42' but not '042') are
+  accepted, so cells always come back out exactly as they went in.
+
+  Args:
+    typecode:   array typecode, 'q' for integers or 'd' for floats
+  """
+  def __init__(self,typecode):
+    self.data=array(typecode)
+    self.typecode=typecode
+    if typecode == 'q':
+      self.kind='int'
+      self._num=int
+      self._fmt=int.__str__
+    else:
+      self.kind='float'
+      self._num=float
+      self._fmt=float.__repr__
+  def __len__(self):
+    return len(self.data)
+  def __getitem__(self,i):
+    return self._fmt(self.data[i])
+  def __iter__(self):
+    return map(self._fmt,self.data)
+  def iter_from(self,first):
+    return map(self._fmt,self.data[first:])
+  def append(self,value):
+    """
+    Append a cell to the column.
+
+    Returns:
+      True if the cell could be stored as a number, False otherwise (meaning
+      the column needs to be converted to a string column)
+    """
+    try:
+      if value.__class__ is str:
+        v=self._num(value)
+        if self._fmt(v) != value:
+          return False
+      elif value.__class__ is self._num:
+        v=value
+      else:
+        return False
+      self.data.append(v)
+    except (ValueError,OverflowError):
+      return False
+    return True
+  def extend(self,values):
+    """
+    Append a list of cells to the column, all or nothing
+
+    Returns:
+      True if all the cells could be stored as numbers, False otherwise (and
+      nothing was appended)
+    """
+    num=self._num
+    kinds=set(map(type,values))
+    try:
+      if kinds == {str}:
+        nums=list(map(num,values))
+        if list(map(self._fmt,nums)) != values:
+          return False
+      elif kinds == {num}:
+        nums=values
+      else:
+        return False
+      self.data.extend(array(self.typecode,nums))
+    except (ValueError,OverflowError):
+      return False
+    return True
+  def copy(self):
+    new_col=_NumColumn(self.typecode)
+    new_col.data=_copy_array(self.typecode,self.data)
+    return new_col
+  def take(self,positions,np):
+    """
+    Gather the cells at positions into a new column with NumPy
+
+    Args:
+      positions:  NumPy int64 array of row positions
+      np:         The numpy module
+
+    Returns:
+      Tuple of (new column, width of the widest cell in characters)
+    """
+    values=np.frombuffer(self.data,dtype=np.dtype(self.typecode))[positions]
+    new_col=_NumColumn(self.typecode)
+    new_col.data=_copy_array(self.typecode,values)
+    if not len(values):
+      return new_col,0
+    if self.kind == 'int':
+      #The widest integer is the smallest or the largest
+      return new_col,max(len(str(int(values.min()))),len(str(int(values.max()))))
+    return new_col,max(map(len,map(self._fmt,values.tolist())))
+  def own(self):
+    """
+    Copy a column loaded from a snapshot file into memory, so it can be
+    appended to
+    """
+    if self.data.__class__ is not array:
+      self.data=_copy_array(self.typecode,self.data)
+
+def _new_column(value):
+  """
+  Pick the most compact column container able to hold value
+  """
+  for typecode in ('q','d'):
+    col=_NumColumn(typecode)
+    if col.append(value):
+      return col
+  col=_StrColumn()
+  col.append(value)
+  return col
+
+class _ColumnRows:
+  """
+  Read only sequence view of the rows in a ColumnStore. Rows are handed back
+  as tuples built straight from the column iterators.
+  """
+  def __init__(self,store):
+    self._store=store
+  def __len__(self):
+    return self._store.row_count
+  def __iter__(self):
+    columns=self._store.columns
+    if not columns:
+      return repeat((),self._store.row_count)
+    return zip(*columns)
+  def iter_from(self,start):
+    columns=self._store.columns
+    if not columns:
+      return repeat((),max(self._store.row_count-start,0))
+    return zip(*[c.iter_from(start) for c in columns])
+  def __getitem__(self,i):
+    if isinstance(i,slice):
+      return [self[r] for r in range(*i.indices(len(self)))]
+    return tuple(c[i] for c in self._store.columns)
+
+class _SparseRows:
+  """
+  Sequence view over a dictionary that only holds entries for rows that have
+  a non empty value. All other rows return default.
+  """
+  def __init__(self,store,values,default):
+    self._store=store
+    self._values=values
+    self._default=default
+  def __len__(self):
+    return self._store.row_count
+  def __iter__(self):
+    get=self._values.get
+    default=self._default
+    for i in range(self._store.row_count):
+      yield get(i,default)
+  def iter_from(self,start):
+    get=self._values.get
+    default=self._default
+    for i in range(start,self._store.row_count):
+      yield get(i,default)
+  def __getitem__(self,i):
+    if isinstance(i,slice):
+      return [self[r] for r in range(*i.indices(len(self)))]
+    if i < 0:
+      i+=self._store.row_count
+    if i < 0 or i >= self._store.row_count:
+      raise IndexError('row index out of range')
+    return self._values.get(i,self._default)
+
+class _RingRows(deque):
+  """
+  The rows (or row colors/render options) of a bounded Table. A deque, so the
+  oldest rows come off the front in O(1), that can also be sliced like a list.
+  """
+  def __getitem__(self,i):
+    if isinstance(i,slice):
+      return [deque.__getitem__(self,r) for r in range(*i.indices(len(self)))]
+    return deque.__getitem__(self,i)
+
+class ColumnStore:
+  """
+  Columnar storage for the rows of a Table. Each column is held in its own
+  compact container: an array.array for numeric columns and an offsets+blob
+  buffer for string columns. Row colors and render options are kept sparse,
+  only rows that actually have them take up any space.
+
+  The Table attributes rows, row_colorization and row_render_opts become
+  read only sequence views over the store. Cells are always handed back as
+  strings.
+  """
+  def __init__(self):
+    self.columns=[]
+    self.row_count=0
+    self.colorization=dict()
+    self.render_opts=dict()
+    self.loaded=False #Columns still point into a snapshot file, see Table.load()
+    self.rows=_ColumnRows(self)
+    self.row_colorization=_SparseRows(self,self.colorization,())
+    self.row_render_opts=_SparseRows(self,self.render_opts,None)
+  def append(self,cells,colors=None,opts=None):
+    """
+    Append a row to the store
+
+    Args:
+      cells:    List of cells
+      colors:   List of colors for the cells
+      opts:     Renderer options dictionary for the row
+    """
+    if self.loaded:
+      self._own()
+    columns=self.columns
+    col_cnt=len(columns)
+    count=0
+    for c in cells:
+      if count < col_cnt:
+        col=columns[count]
+        if not col.append(c):
+          #Cell doesn't fit the numeric container, convert to a string column
+          col=_StrColumn(col)
+          col.append(c)
+          columns[count]=col
+      else:
+        if self.row_count:
+          col=_StrColumn()
+          col.fill_empty(self.row_count)
+          col.append(c)
+        else:
+          col=_new_column(c)
+        columns.append(col)
+      count+=1
+    while count < col_cnt:
+      col=columns[count]
+      if not col.append(''):
+        col=_StrColumn(col)
+        col.append('')
+        columns[count]=col
+      count+=1
+    if colors:
+      self.colorization[self.row_count]=colors
+    if opts:
+      self.render_opts[self.row_count]=opts
+    self.row_count+=1
+  def extend(self,cells_batch,colors_batch,opts_batch):
+    """
+    Append a batch of rows to the store. When the rows all have one cell per
+    column they are added a column at a time.
+
+    Args:
+      cells_batch:  List of rows (lists of cells)
+      colors_batch: List of colors, one per row
+      opts_batch:   List of renderer options dictionaries, one per row
+    """
+    if not cells_batch:
+      return
+    if self.loaded:
+      self._own()
+    start=0
+    if not self.columns:
+      #The first row picks the column containers
+      self.append(cells_batch[0],colors_batch[0],opts_batch[0])
+      start=1
+      if len(cells_batch) == 1:
+        return
+    columns=self.columns
+    col_cnt=len(columns)
+    if set(map(len,islice(cells_batch,start,None))) - {col_cnt}:
+      for cells,colors,opts in islice(zip(cells_batch,colors_batch,opts_batch),start,None):
+        self.append(cells,colors,opts)
+      return
+    for i in range(col_cnt):
+      values=list(map(itemgetter(i),islice(cells_batch,start,None)))
+      col=columns[i]
+      if not col.extend(values):
+        col=_StrColumn(col)
+        col.extend(values)
+        columns[i]=col
+    row_pos=self.row_count
+    for colors,opts in islice(zip(colors_batch,opts_batch),start,None):
+      if colors:
+        self.colorization[row_pos]=colors
+      if opts:
+        self.render_opts[row_pos]=opts
+      row_pos+=1
+    self.row_count=row_pos
+  def _own(self):
+    """
+    Copy columns loaded from a snapshot file into memory before the first
+    row is added
+    """
+    for col in self.columns:
+      col.own()
+    self.loaded=False
+  def copy(self):
+    """
+    Create a copy of the store
+
+    Returns:
+      ColumnStore
+    """
+    new_store=ColumnStore()
+    new_store.columns=[c.copy() for c in self.columns]
+    new_store.row_count=self.row_count
+    new_store.colorization.update(self.colorization)
+    new_store.render_opts.update(self.render_opts)
+    return new_store
+
+class _MappedRows:
+  """
+  Read only sequence view of the rows in a MappedStore. Rows are decoded from
+  the file only when asked for, and handed back as lists of strings.
+  """
+  def __init__(self,store):
+    self._store=store
+  def __len__(self):
+    return self._store.row_count
+  def __iter__(self):
+    return self.iter_from(0)
+  def iter_from(self,start):
+    store=self._store
+    data=store.data
+    encoding=store.encoding
+    sep=store.sep
+    offsets=store.offsets
+    for i in range(start,store.row_count):
+      line=data[offsets[i]:offsets[i+1]-1].decode(encoding)
+      if line.endswith('\r'):
+        line=line[:-1]
+      yield line.split(sep)
+  def __getitem__(self,i):
+    if isinstance(i,slice):
+      return [self[r] for r in range(*i.indices(len(self)))]
+    return self._store.row(i)
+
+class MappedStore:
+  """
+  Read only storage for the rows of a Table, backed by a memory mapped
+  delimited file (one row per line, cells split on sep, no quoting). The
+  file is scanned once to build an array of where each row starts, and to
+  work out the column widths. Rows are only decoded when they are rendered
+  or filtered, so besides the index (8 bytes a row) the table takes next to
+  no memory. See Table.map_file()
+
+  Args:
+    path:       Path of the file
+    sep:        Separator character. Default=','
+    header:     Whether the first line holds the column names. Default=True
+    encoding:   Encoding of the file. Default='utf-8'
+  """
+  def __init__(self,path,sep=',',header=True,encoding='utf-8'):
+    import mmap
+    self.sep=sep
+    self.encoding=encoding
+    self.col_names=[]
+    self.col_widths_real=[]
+    self.offsets=array('Q')
+    with open(path,'rb') as f:
+      if f.seek(0,2) == 0:
+        self.data=b''
+      else:
+        self.data=mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+    self.rows=_MappedRows(self)
+    self.row_colorization=_SparseRows(self,dict(),())
+    self.row_render_opts=_SparseRows(self,dict(),None)
+    self.row_count=0
+    self._scan(header)
+  scan_block_size=1048576 #Bytes of the file looked at at a time when scanning
+  def _scan(self,header):
+    """
+    Index where every row starts, and find the widest cell of each column.
+    The file is gone through in blocks of whole lines, each decoded and
+    split in one go.
+    """
+    data=self.data
+    size=len(data)
+    offsets=self.offsets
+    widths=self.col_widths_real
+    pos=0
+    while pos < size:
+      stop=min(pos+self.scan_block_size,size)
+      if stop < size:
+        #Only whole lines
+        nl=data.rfind(b'\n',pos,stop)
+        if nl < 0:
+          nl=data.find(b'\n',stop)
+        stop=size if nl < 0 else nl+1
+      raw=data[pos:stop]
+      text=raw.decode(self.encoding)
+      lines=text.split('\n')
+      if not lines[-1]:
+        #Block ends with a newline
+        lines.pop()
+      if len(raw) == len(text):
+        #All ascii, so character counts are byte counts
+        line_sizes=map(len,lines)
+      else:
+        line_sizes=[len(l.encode(self.encoding)) for l in lines]
+      starts=accumulate((l+1 for l in line_sizes),initial=pos)
+      if '\r' in text:
+        lines=[l[:-1] if l.endswith('\r') else l for l in lines]
+      rows=[l.split(self.sep) for l in lines]
+      if header and not self.col_names and not offsets and rows:
+        self.col_names=rows.pop(0)
+        next(starts)
+      offsets.extend(islice(starts,len(rows)))
+      if rows:
+        lengths=set(map(len,rows))
+        if len(lengths) == 1:
+          cols=(map(itemgetter(i),rows) for i in range(lengths.pop()))
+        else:
+          cols=zip_longest(*rows,fillvalue='')
+        for i,col in enumerate(cols):
+          c_len=max(map(len,col))
+          if i == len(widths):
+            widths.append(c_len)
+          elif c_len > widths[i]:
+            widths[i]=c_len
+      pos=stop
+    #End of the last row (plus its newline), so row i is offsets[i]:offsets[i+1]-1
+    if size and data[size-1:size] == b'\n':
+      offsets.append(size)
+    else:
+      offsets.append(size+1)
+    self.row_count=len(offsets)-1
+  def row(self,i):
+    """
+    Decode a single row
+
+    Args:
+      i:    Row index
+
+    Returns:
+      List of strings
+    """
+    if i < 0:
+      i+=self.row_count
+    if i < 0 or i >= self.row_count:
+      raise IndexError('row index out of range')
+    line=self.data[self.offsets[i]:self.offsets[i+1]-1].decode(self.encoding)
+    if line.endswith('\r'):
+      line=line[:-1]
+    return line.split(self.sep)
+  def append(self,cells,colors=None,opts=None):
+    raise TypeError('Tables over a mapped file are read only')
+  def extend(self,cells_batch,colors_batch,opts_batch):
+    raise TypeError('Tables over a mapped file are read only')
+  def copy(self):
+    """
+    The store is read only, so copies can share it
+
+    Returns:
+      MappedStore
+    """
+    return self
+  def close(self):
+    """
+    Unmap the file, the store has no rows afterwards
+    """
+    if not isinstance(self.data,bytes):
+      self.data.close()
+    self.data=b''
+    self.offsets=array('Q',[0])
+    self.row_count=0
+  def __enter__(self):
+    return self
+  def __exit__(self,exc_type,exc_value,traceback):
+    self.close()
+
+def _typed_value(val_type,cell):
+  """
+  Coerce a cell the same way TableFilter row rules do
+
+  Args:
+    val_type: One of 'number', 'date', 'string'
+    cell:     The cell to coerce
+
+  Returns:
+    String/Float, or None if the cell can't be coerced
+  """
+  if val_type == 'string':
+    return str(cell)
+  if val_type == 'number':
+    try:
+      return float(cell)
+    except (ValueError,TypeError):
+      return None
+  try:
+    return _get_date_epoch()(cell)
+  except TypeError:
+    return None
+
+def _column_cells(rows,col):
+  """
+  Iterate over the cells of one column, '' for rows too short to have it
+  """
+  for cells in rows:
+    yield cells[col] if col < len(cells) else ''
+
+def _sort_key(cols,types):
+  """
+  Build the function Table.sort_by() decorates rows with
+
+  Args:
+    cols:   List of column indexes (starting at 0)
+    types:  List of 'number', 'date' or 'string', one per column
+
+  Returns:
+    Function taking a row and returning a tuple, with 0,value per column, or
+    1,default for empty cells and cells that aren't of the column's type
+  """
+  plan=[(col,val_type,'' if val_type == 'string' else 0.0) for col,val_type in zip(cols,types)]
+  def key(cells):
+    k=[]
+    cell_count=len(cells)
+    for col,val_type,default in plan:
+      c=cells[col] if col < cell_count else ''
+      v=_typed_value(val_type,c) if c != '' else None
+      if v is None:
+        k+=(1,default)
+      else:
+        k+=(0,v)
+    return tuple(k)
+  return key
+
+def _external_sort(entries,key,reverse,budget_rows):
+  """
+  Sort rows that don't fit the in memory budget: sorted runs of budget_rows
+  rows are pickled to temporary files, then merged back.
+
+  Args:
+    entries:      Iterable of (cells,colors,opts) tuples
+    key:          Sort key function taking the cells
+    reverse:      Sort in descending order
+    budget_rows:  Number of rows per run
+
+  Returns:
+    Generator of (key,cells,colors,opts) tuples in sorted order
+  """
+  import heapq
+  import pickle
+  import tempfile
+  runs=[]
+  try:
+    entries=iter(entries)
+    while True:
+      run=[(key(cells),cells,colors,opts) for cells,colors,opts in islice(entries,budget_rows)]
+      if not run:
+        break
+      run.sort(key=itemgetter(0),reverse=reverse)
+      run_file=tempfile.TemporaryFile()
+      runs.append(run_file)
+      for i in range(0,len(run),1000):
+        pickle.dump(run[i:i+1000],run_file,pickle.HIGHEST_PROTOCOL)
+      run_file.seek(0)
+      del run
+    def read_run(run_file):
+      while True:
+        try:
+          block=pickle.load(run_file)
+        except EOFError:
+          return
+        for entry in block:
+          yield entry
+    for entry in heapq.merge(*[read_run(f) for f in runs],key=itemgetter(0),reverse=reverse):
+      yield entry
+  finally:
+    for run_file in runs:
+      run_file.close()
+
+class ColumnIndex:
+  """
+  A secondary index over one column of a Table. TableFilter uses these to
+  only look at the rows that can match a row rule instead of scanning the
+  whole table. Indexes are created with Table.create_index and kept up to
+  date as rows are added.
+
+  The cells are indexed per value type (number, date or string, same as row
+  rules). The index for a type is built the first time a rule of that type
+  uses it. Sorted indexes append keys that arrive in order straight on the
+  end, others are kept in an unsorted tail that gets sorted and merged in by
+  the next lookup, so adding rows never has to shift the whole index.
+
+  Args:
+    col:      Column id (starting at 1, same as in TableFilter rules)
+    kind:     'hash' for '=' and '!=' rules, or 'sorted' which handles '<',
+              '<=', '>', '>=' as well. Default='hash'
+  """
+  kinds=('hash','sorted')
+  def __init__(self,col,kind='hash'):
+    if kind not in self.kinds:
+      raise ValueError("Index kind must be one of: 'hash', 'sorted'")
+    try:
+      self.col=int(col)
+    except ValueError:
+      raise ValueError("Index column must be a number: " + str(col))
+    if self.col < 1:
+      raise ValueError("Index column ids start at 1")
+    self.kind=kind
+    self._typed=dict()
+  def _add_typed(self,val_type,typed,pos,row):
+    """
+    Add row number pos to the index for val_type
+    """
+    if len(row) < self.col:
+      return
+    v=_typed_value(val_type,row[self.col-1])
+    if v is None:
+      return
+    if self.kind == 'hash':
+      try:
+        typed[v].append(pos)
+      except KeyError:
+        typed[v]=[pos]
+    elif v == v:
+      #NaN can't be ordered, and never matches a range anyway
+      keys,positions,tail=typed
+      if not tail and (not keys or v >= keys[-1]):
+        keys.append(v)
+        positions.append(pos)
+      else:
+        tail.append((v,pos))
+  def _get_typed(self,rows,val_type):
+    """
+    Returns the index for val_type, building it from rows when needed
+    """
+    typed=self._typed.get(val_type)
+    if typed is None:
+      if self.kind == 'hash':
+        typed=dict()
+        pos=0
+        for row in rows:
+          self._add_typed(val_type,typed,pos,row)
+          pos+=1
+      else:
+        #Sort everything in one go rather than inserting one at a time
+        pairs=[]
+        pos=0
+        for row in rows:
+          if len(row) >= self.col:
+            v=_typed_value(val_type,row[self.col-1])
+            if v is not None and v == v:
+              pairs.append((v,pos))
+          pos+=1
+        pairs.sort(key=itemgetter(0))
+        typed=[[p[0] for p in pairs],[p[1] for p in pairs],[]]
+      self._typed[val_type]=typed
+    return typed
+  def _merge_tail(self,typed):
+    """
+    Merge the unsorted tail of keys added out of order into a sorted index
+
+    Returns:
+      Tuple of (sorted keys, their row positions)
+    """
+    keys,positions,tail=typed
+    if tail:
+      #Both runs are already mostly sorted, which the sort picks up on. It
+      # is stable, so rows with equal keys stay in the order they were added
+      tail.sort(key=itemgetter(0))
+      pairs=list(zip(keys,positions))
+      pairs.extend(tail)
+      pairs.sort(key=itemgetter(0))
+      typed[0]=keys=[p[0] for p in pairs]
+      typed[1]=positions=[p[1] for p in pairs]
+      del tail[:]
+    return keys,positions
+  def add(self,pos,row):
+    """
+    Add a row to the index. Called by Table when a row is added.
+
+    Args:
+      pos:    Position of the row in the table
+      row:    List of cells
+    """
+    for val_type,typed in self._typed.items():
+      self._add_typed(val_type,typed,pos,row)
+  def lookup(self,rows,val_type,op,val):
+    """
+    Find the rows that can match a row rule.
+
+    Args:
+      rows:       The rows of the table that is indexed
+      val_type:   Value type of the rule, one of 'number', 'date', 'string'
+      op:         Rule operator
+      val:        Rule comparison value
+
+    Returns:
+      List of row positions, or None if this index can't answer the rule
+    """
+    if self.kind == 'hash':
+      if op == '=':
+        return list(self._get_typed(rows,val_type).get(val,()))
+      if op == '!=':
+        matches=set(self._get_typed(rows,val_type).get(val,()))
+        return [i for i in range(len(rows)) if i not in matches]
+      return None
+    if op not in ('=','<','<=','>','>='):
+      return None
+    keys,positions=self._merge_tail(self._get_typed(rows,val_type))
+    if op == '=':
+      return positions[bisect_left(keys,val):bisect_right(keys,val)]
+    if op == '<':
+      return positions[:bisect_left(keys,val)]
+    if op == '<=':
+      return positions[:bisect_right(keys,val)]
+    if op == '>':
+      return positions[bisect_right(keys,val):]
+    return positions[bisect_left(keys,val):]
+
+class Table:
+  """
+  The table class. This contains rows, and metadata such as colum counts/size
+  etc...
+  
+  Args:
+    renderer:      Render oject which is how to render the table data
+    output:        A file like object to write data to, This can also be the
+                   key word 'String' to write to the internal string:
+                     built_buffer, or an OutputSink object (StringSink,
+                     FileSink, BytesSink...). Default=sys.stdout
+    table_filter:  TableFilter object, to filter data as they are added
+                   to the table
+    storage:       How rows are kept in memory. Either 'rows' where each row
+                   is a list in self.rows, or 'columnar' where rows are held
+                   in a ColumnStore. Default='rows'
+    concurrent:    Allow add_row() to be called from many threads at once.
+                   Each thread buffers its rows, and buffers are merged into
+                   the table in batches of ingest_batch_rows. Renders work
+                   off a snapshot so they don't hold up the threads adding
+                   rows. Default=False
+    max_rows:      Only keep the newest max_rows rows, older ones are dropped
+                   as rows are added. Column widths shrink back when the
+                   widest rows are dropped. Default=None (keep all rows)
+    max_age:       Tuple of (column id, seconds). Only keep rows whose time in
+                   that column (a date, or a number of seconds since the
+                   epoch) is within seconds of the newest row's time.
+                   Default=None
+  """
+  col_count=0 #Number of columns the table currently has
+  data_cur_max_width=0 #This holds the max chars without any truncation etc..
+  data_max_width=0 #This holds what will be the max chars taking into account truncation from static set col widths
+  def_padding=0 #Amount of padding to add to the sides of cells
+  ingest_batch_rows=1000 #Rows a thread buffers before merging them into a concurrent table
+  add_batch_rows=10000 #Rows add_rows() and extend() work on at a time
+  sort_budget_rows=1000000 #Tables with more rows than this are sorted in runs on disk, see sort_by()
+  def __init__(self,renderer=RenderText(),output=sys.stdout,table_filter=None,storage='rows',concurrent=False,max_rows=None,max_age=None):
+    self.col_widths=[] #List of column widths that have been passed in and will truncate or have space if values don't fit
+    self.col_widths_real=[] #List of column widths that are a max width per column
+    self.col_widths_data=[] #Same as col_widths_real, but only for the rows (not the column names)
+    self.col_names=[] #List of names of the columns, used mostly for the header
+    self.indexes=[] #List of ColumnIndex objects, see create_index()
+    self.version=0 #Bumped every time rows are added or changed
+    self._rewrite_version=0 #Value of version the last time existing rows changed (rather than rows being added)
+    self._render_cache=None
+    self._stats=None #TableStats, see enable_stats()
+    if storage == 'columnar':
+      self._set_store(ColumnStore())
+    elif storage == 'rows':
+      self._store=None
+      self.rows=[]
+      self.row_colorization=[]
+      self.row_render_opts=[]
+    else:
+      raise ValueError("Table storage must be one of: 'rows', 'columnar'")
+    self.storage=storage
+    self.max_rows=max_rows
+    self.max_age=max_age
+    self._ring=max_rows is not None or max_age is not None
+    if self._ring:
+      if storage != 'rows':
+        raise ValueError("max_rows and max_age need storage='rows'")
+      if max_age is not None:
+        self.max_age=(int(max_age[0]),float(max_age[1]))
+      self.rows=_RingRows()
+      self.row_colorization=_RingRows()
+      self.row_render_opts=_RingRows()
+      self._ring_times=deque() #Time of each row, for max_age
+      self._ring_newest=None #Newest row time seen
+      self._ring_widths=[] #Per column dictionary of cell width to the number of rows with it
+    self.concurrent=concurrent
+    if concurrent:
+      import threading
+      self._ingest_lock=threading.Lock() #Held while taking rows out of the thread buffers
+      self._merge_lock=threading.Lock() #Held while merging rows into the table
+      self._ingest_local=threading.local()
+      self._ingest_buffers=[] #Tuples of (weakref to the owning thread, buffer)
+      self._ingest_batches=deque() #Batches taken from the buffers, waiting to be merged
+    #Check that the output passed is a file like object:
+    try:
+      if isinstance(output,OutputSink):
+        self._sink=output
+      elif (output != "String"):
+        getattr(output,'write')
+        self._sink=FileSink(output,flush_size=0)
+      else:
+        self._sink=StringSink()
+    except NameError:
+      raise NameError("Name passed as Table output is invalid. Is sys module imported?")
+    except AttributeError:
+      raise AttributeError("Output object passed is not a 'File Like' object with a 'write' method")
+    self.set_table_renderer(renderer)
+    if table_filter:
+      #Check that the table filter passed is a valid TableFilter object
+      try:
+        getattr(table_filter,'filter_table')
+        self.table_filter=table_filter
+      except AttributeError:
+        AttributeError("TableFilter passed is not a valid TableFilter")
+    else:
+      self.table_filter=None
+  @classmethod
+  def from_csv(cls,path_or_file,sep=',',header=True,table_filter=None,encoding='utf-8',**table_args):
+    """
+    Create a Table from a CSV (or TSV etc...) file. The file is read with the
+    csv module a batch of rows at a time. With a table_filter, rows are only
+    kept when they pass its row rules, and only the columns in its column
+    rule are kept, so memory is taken up by what is kept rather than by the
+    size of the file. For example:
+      my_table=Table.from_csv('/path/to/file.tsv',sep='\t',table_filter=TableFilter('1,4;4=Active'))
+
+    Args:
+      path_or_file:   Path of the file, or a file like object opened in text
+                      mode (with newline='')
+      sep:            Separator character. Default=','
+      header:         Whether the first row holds the column names.
+                      Default=True
+      table_filter:   TableFilter for the rows being read. Default=None
+      encoding:       Encoding of the file when a path is given.
+                      Default='utf-8'
+      table_args:     Any other keyword args are passed on to Table(), such
+                      as renderer, output or storage
+
+    Returns:
+      Table
+    """
+    import csv
+    new_table=cls(table_filter=table_filter,**table_args)
+    if isinstance(path_or_file,(str,bytes)) or hasattr(path_or_file,'__fspath__'):
+      csv_file=open(path_or_file,'r',newline='',encoding=encoding)
+      close=True
+    else:
+      csv_file=path_or_file
+      close=False
+    try:
+      reader=csv.reader(csv_file,delimiter=sep)
+      if header:
+        col_names=next(reader,None)
+        if col_names is not None:
+          new_table.set_col_names(col_names)
+      new_table.add_rows(reader)
+    finally:
+      if close:
+        csv_file.close()
+    return new_table
+  @classmethod
+  def map_file(cls,path,sep=',',header=True,encoding='utf-8',**table_args):
+    """
+    Create a read only Table over a delimited file without loading it. The
+    file is memory mapped and scanned once, to index where rows start and
+    work out the column widths. Rows are decoded as they are rendered or
+    filtered. Cells are split on sep, there's no quoting. For example:
+      my_table=Table.map_file('/path/to/file.tsv',sep='\t')
+      my_table.render(offset=1000,limit=50)
+
+    Args:
+      path:         Path of the file
+      sep:          Separator character. Default=','
+      header:       Whether the first line holds the column names.
+                    Default=True
+      encoding:     Encoding of the file. Default='utf-8'
+      table_args:   Any other keyword args are passed on to Table(), such as
+                    renderer or output
+
+    Returns:
+      Table
+    """
+    new_table=cls(**table_args)
+    if new_table._ring or new_table.table_filter:
+      raise ValueError('Tables over a mapped file can\'t have max_rows, max_age or a table_filter, use TableFilter.filter_table on it instead')
+    store=MappedStore(path,sep,header,encoding)
+    new_table._set_store(store)
+    new_table.storage='mapped'
+    if store.col_names:
+      new_table.set_col_names(store.col_names)
+    new_table._merge_col_widths(store.col_widths_real)
+    new_table._merge_data_widths(store.col_widths_real)
+    new_table.col_count=max(new_table.col_count,len(store.col_widths_real))
+    return new_table
+  def close(self):
+    """
+    Unmap the file of a table made with Table.map_file(), the table has no
+    rows afterwards. Copies of the table share the file, so they are closed
+    too. Does nothing on other tables. Tables can also be used in a with
+    statement, which closes them at the end:
+      with Table.map_file('/path/to/file.tsv',sep='\t') as my_table:
+        my_table.render()
+    """
+    if self.storage == 'mapped':
+      self._store.close()
+      self._rows_changed()
+  def __enter__(self):
+    return self
+  def __exit__(self,exc_type,exc_value,traceback):
+    self.close()
+  snapshot_magic=b'DYNTBL01'
+  def save(self,path):
+    """
+    Save the table to a compact binary snapshot file, which Table.load() can
+    map back in without parsing anything. Rows are saved column by column
+    (the same containers as storage='columnar' uses), along with the row
+    colors, renderer options, column names and widths.
+
+    The file is written next to path first and then moved over it, so a
+    table loaded from path can be saved back to it.
+
+    Args:
+      path:   Path of the file to write
+    """
+    import json
+    import os
+    import tempfile
+    self.merge_pending()
+    if self.storage == 'columnar':
+      store=self._store
+    else:
+      store=ColumnStore()
+      rows=iter(self.rows)
+      while True:
+        batch=list(islice(rows,self.add_batch_rows))
+        if not batch:
+          break
+        count=len(batch)
+        store.extend([list(_pad_row(r,self.col_count)) for r in batch],[()]*count,[None]*count)
+    meta={
+      'byteorder': sys.byteorder,
+      'row_count': len(self.rows),
+      'col_count': self.col_count,
+      'col_names': self.col_names,
+      'col_widths': self.col_widths,
+      'col_widths_real': self.col_widths_real,
+      'col_widths_data': self.col_widths_data,
+      'data_max_width': self.data_max_width,
+      'data_cur_max_width': self.data_cur_max_width,
+      'colorization': dict((i,c) for i,c in enumerate(self.row_colorization) if c),
+      'render_opts': dict((i,o) for i,o in enumerate(self.row_render_opts) if o),
+      'columns': [],
+    }
+    sections=[]
+    pos=0
+    for col in store.columns:
+      if col.kind == 'str':
+        buffers=(col.offsets,col.blob)
+        meta['columns'].append({'kind': 'str'})
+      else:
+        buffers=(col.data,)
+        meta['columns'].append({'kind': col.kind, 'typecode': col.typecode})
+      spans=[]
+      for buf in buffers:
+        size=memoryview(buf).nbytes
+        spans.append([pos,size])
+        sections.append(buf)
+        #Keep every section 8 byte aligned, so it can be cast in place
+        pos+=size+(-size % 8)
+      meta['columns'][-1]['spans']=spans
+    header=json.dumps(meta).encode('utf-8')
+    header+=b' '*(-(len(self.snapshot_magic)+8+len(header)) % 8)
+    #Written to a temporary file that then replaces path, the columns may be
+    # mapped from path itself (saving a table back where it was loaded from)
+    # and truncating it would pull the data out from under them
+    fd,tmp_path=tempfile.mkstemp(prefix='.'+os.path.basename(path)+'.',suffix='.tmp',dir=os.path.dirname(os.path.abspath(path)))
+    try:
+      with os.fdopen(fd,'wb') as f:
+        f.write(self.snapshot_magic)
+        f.write(len(header).to_bytes(8,'little'))
+        f.write(header)
+        for buf in sections:
+          f.write(buf)
+          size=memoryview(buf).nbytes
+          f.write(b'\0'*(-size % 8))
+        f.flush()
+        os.fsync(f.fileno())
+      os.replace(tmp_path,path)
+    except BaseException:
+      os.unlink(tmp_path)
+      raise
+  @classmethod
+  def load(cls,path,**table_args):
+    """
+    Load a table saved with Table.save(). The file is memory mapped and the
+    columns point straight into it, so loading takes about the same time
+    however many rows there are, and column widths don't get worked out
+    again. Loaded tables use storage='columnar', the columns are copied into
+    memory the first time a row gets added.
+
+    Args:
+      path:         Path of the snapshot file
+      table_args:   Any other keyword args are passed on to Table(), such as
+                    renderer or output
+
+    Returns:
+      Table
+    """
+    import json
+    import mmap
+    with open(path,'rb') as f:
+      data=mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+    magic_len=len(cls.snapshot_magic)
+    if data[:magic_len] != cls.snapshot_magic:
+      raise ValueError('Not a table snapshot file: %s' % (path))
+    header_len=int.from_bytes(data[magic_len:magic_len+8],'little')
+    base=magic_len+8+header_len
+    meta=json.loads(data[magic_len+8:base].decode('utf-8'))
+    if meta['byteorder'] != sys.byteorder:
+      raise ValueError('Table snapshot was saved on a machine with a different byte order')
+    view=memoryview(data)
+    store=ColumnStore()
+    for col_meta in meta['columns']:
+      spans=[view[base+start:base+start+size] for start,size in col_meta['spans']]
+      if col_meta['kind'] == 'str':
+        col=_StrColumn()
+        col.offsets=spans[0].cast('Q')
+        col.blob=spans[1]
+      else:
+        col=_NumColumn(col_meta['typecode'])
+        col.data=spans[0].cast(col_meta['typecode'])
+      store.columns.append(col)
+    store.row_count=meta['row_count']
+    store.colorization.update((int(i),c) for i,c in meta['colorization'].items())
+    store.render_opts.update((int(i),o) for i,o in meta['render_opts'].items())
+    store.loaded=True
+    table_args['storage']='columnar'
+    new_table=cls(**table_args)
+    new_table._set_store(store)
+    new_table.col_names=meta['col_names']
+    new_table.col_count=meta['col_count']
+    new_table.col_widths=meta['col_widths']
+    new_table.col_widths_real=meta['col_widths_real']
+    #Snapshots saved before col_widths_data was kept only have the widths
+    # with the column names
+    new_table.col_widths_data=meta.get('col_widths_data',list(meta['col_widths_real']))
+    new_table.data_max_width=meta['data_max_width']
+    new_table.data_cur_max_width=meta['data_cur_max_width']
+    return new_table
+  def _derived_storage(self):
+    """
+    Returns the storage for tables made from this one (filtered, grouped
+    etc...), mapped tables are read only so those use 'rows'
+    """
+    if self.storage == 'mapped':
+      return 'rows'
+    return self.storage
+  def __str__(self):
+    """
+    Converts the table to a string object using the supplied renderer
+    
+    Returns:
+      String
+    """
+    return self.renderer.print_table(self._render_source())
+  def __len__(self):
+    """
+    Converts the table representation to a specified length, which
+    is the number of rows currently added to the table.
+    
+    Returns:
+      String
+    """
+    self.merge_pending()
     return len(self.rows)
   ####These functions are helper functions meant to be somewhat private####
+  def _set_store(self,store):
+    """
+    Use store (ColumnStore) to hold the rows of the table
+    """
+    self._store=store
+    self.rows=store.rows
+    self.row_colorization=store.row_colorization
+    self.row_render_opts=store.row_render_opts
+    self._rows_changed()
+  def _rows_changed(self):
+    """
+    Record that existing rows were changed, reordered or removed, rather than
+    just added to. Anything cached about the rows is invalid after this.
+    """
+    self.version+=1
+    self._rewrite_version=self.version
+    self._render_cache=None
+  def _cached_row_chunks(self,key,render_from,row_count=None):
+    """
+    Yields rendered row chunks, reusing the ones kept from the last render
+    with the same key and only rendering the rows added since. Used by
+    renderers created with row_cache=True.
+
+    Args:
+      key:          Tuple of everything the rendered rows depend on (widths,
+                    renderer options etc...)
+      render_from:  Function taking the index of the first row to render and
+                    returning a generator of rendered chunks
+      row_count:    Number of rows being rendered. Default=all of them
+
+    Returns:
+      Generator of Strings
+    """
+    cache=self._render_cache
+    if row_count is None:
+      row_count=len(self.rows)
+    if cache is None or cache['key'] != key or cache['rewrite'] != self._rewrite_version or cache['rows_id'] != id(self.rows) or cache['row_count'] > row_count:
+      cache={'key': key, 'rewrite': self._rewrite_version, 'rows_id': id(self.rows), 'row_count': 0, 'chunks': []}
+      self._render_cache=cache
+    for chunk in list(cache['chunks']):
+      yield chunk
+    first=cache['row_count']
+    if first < row_count:
+      new_chunks=[]
+      for chunk in render_from(first):
+        new_chunks.append(chunk)
+        yield chunk
+      #Another render (from a snapshot) may have got there first
+      if cache['row_count'] == first:
+        cache['chunks'].extend(new_chunks)
+        cache['row_count']=row_count
+  def _buffer_row(self,cells,color_cells,renderer_opts):
+    """
+    Add a row to the calling thread's buffer on a concurrent table, merging
+    the buffer into the table once it holds ingest_batch_rows rows
+    """
+    buf=getattr(self._ingest_local,'buffer',None)
+    if buf is None:
+      import threading
+      import weakref
+      buf=[]
+      self._ingest_local.buffer=buf
+      with self._ingest_lock:
+        self._ingest_buffers.append((weakref.ref(threading.current_thread()),buf))
+    buf.append((cells,color_cells,renderer_opts))
+    if len(buf) >= self.ingest_batch_rows:
+      with self._ingest_lock:
+        self._take_buffer(buf)
+      #If another thread is merging, the batch is left for the next merge
+      # rather than waiting on it
+      if self._merge_lock.acquire(False):
+        try:
+          self._merge_batches()
+        finally:
+          self._merge_lock.release()
+  def _take_buffer(self,buf):
+    """
+    Move the rows from a thread's buffer to the batches waiting to be merged.
+    The caller must hold _ingest_lock. The owning thread may keep appending
+    to buf meanwhile, only the rows there when this started are taken.
+    """
+    count=len(buf)
+    if not count:
+      return
+    self._ingest_batches.append(buf[:count])
+    del buf[:count]
+  def _merge_batches(self):
+    """
+    Merge the batches taken from the thread buffers into the table, in the
+    order they were taken so each thread's rows stay in order. Each batch is
+    stored with _store_rows(), the same as add_rows(). The caller must hold
+    _merge_lock.
+    """
+    batches=self._ingest_batches
+    while batches:
+      cells_batch,colors_batch,opts_batch=map(list,zip(*batches.popleft()))
+      self._store_rows(cells_batch,colors_batch,opts_batch)
+  def _merge_all(self):
+    """
+    Merge every thread's buffer into the table. The caller must hold
+    _merge_lock, _ingest_lock is only held while the buffers are emptied, so
+    threads adding rows aren't held up by the merge itself. Buffers of
+    threads that have finished are dropped.
+    """
+    with self._ingest_lock:
+      live=[]
+      for owner,buf in self._ingest_buffers:
+        #Checked before taking the rows, a thread that is still running can
+        # append more rows (without the lock) right after the take
+        thread=owner()
+        alive=thread is not None and thread.is_alive()
+        self._take_buffer(buf)
+        if alive:
+          live.append((owner,buf))
+      self._ingest_buffers=live
+    self._merge_batches()
+  def _render_source(self,offset=0,limit=None,widths='global'):
+    """
+    Returns what renderers should render, the table itself, a window of it
+    when only some of the rows are wanted, and for concurrent tables a
+    snapshot of it
+    """
+    table=self
+    if self.concurrent:
+      table=self.snapshot()
+    if offset or limit is not None or widths != 'global':
+      table=_TableWindow(table,offset,limit,widths)
+    if table is not self:
+      table._stats=self._stats
+    return table
+  def _append_row(self,cells,color_cells,renderer_opts):
+    """
+    Store a row, its colors and renderer options
+    """
+    if self._store is None:
+      self.rows.append(cells)
+      self.row_colorization.append(color_cells)
+      self.row_render_opts.append(renderer_opts)
+    else:
+      self._store.append(cells,color_cells,renderer_opts)
+    self.version+=1
+    if self._ring:
+      self._ring_track(cells)
+    if self.indexes:
+      pos=len(self.rows)-1
+      for index in self.indexes:
+        index.add(pos,cells)
+  def _ring_track(self,cells):
+    """
+    Record the cell widths (and time) of a row added to a bounded table
+    """
+    ring_widths=self._ring_widths
+    for i,c in enumerate(cells):
+      if i == len(ring_widths):
+        ring_widths.append(dict())
+      c_len=len(c) if isinstance(c,str) else len(str(c))
+      ring_widths[i][c_len]=ring_widths[i].get(c_len,0)+1
+    if self.max_age is not None:
+      col=self.max_age[0]-1
+      c=cells[col] if col < len(cells) else ''
+      row_time=_typed_value('number',c)
+      if row_time is None:
+        row_time=_typed_value('date',c)
+      if row_time is None:
+        #Rows without a time are kept as long as the row before them
+        row_time=self._ring_times[-1] if self._ring_times else self._ring_newest
+      elif self._ring_newest is None or row_time > self._ring_newest:
+        self._ring_newest=row_time
+      self._ring_times.append(row_time)
+  def _ring_evict(self):
+    """
+    Drop the oldest rows of a bounded table until it is within max_rows and
+    max_age, then shrink column widths that were only that wide because of
+    the dropped rows
+    """
+    rows=self.rows
+    times=self._ring_times
+    drop=0
+    if self.max_rows is not None and len(rows) > self.max_rows:
+      drop=len(rows)-self.max_rows
+    if self.max_age is not None and self._ring_newest is not None:
+      oldest=self._ring_newest-self.max_age[1]
+      while drop < len(times) and (times[drop] is None or times[drop] < oldest):
+        drop+=1
+    if not drop:
+      return
+    ring_widths=self._ring_widths
+    shrink=set()
+    for _ in range(drop):
+      cells=rows.popleft()
+      self.row_colorization.popleft()
+      self.row_render_opts.popleft()
+      if times:
+        times.popleft()
+      for i,c in enumerate(cells):
+        c_len=len(c) if isinstance(c,str) else len(str(c))
+        counts=ring_widths[i]
+        if counts[c_len] == 1:
+          del counts[c_len]
+          shrink.add(i)
+        else:
+          counts[c_len]-=1
+    widths=self.col_widths_real
+    data_widths=self.col_widths_data
+    col_names=self.col_names
+    for i in shrink:
+      if i < len(widths):
+        width=max(ring_widths[i]) if ring_widths[i] else 0
+        if i < len(data_widths):
+          data_widths[i]=width
+        if i < len(col_names):
+          width=max(width,len(col_names[i]))
+        widths[i]=width
+    if shrink:
+      self._update_data_max_width()
+    self._rows_changed()
   def _output(self,data):
     """
     Handle writes, either to file like object passed to __init__.output or
-    to the built in string buffer "built_buffer"
+    to the built in string buffer "built_buffer". Both go through an
+    OutputSink
     """
-    if self._output_file:
-      #This handles writing out our content
-      self._output_file.write(data)
-    else:
-      self.built_buffer+=data
+    self._sink.write(data)
+  def _copy_sink(self):
+    """
+    Returns the sink a copy of this table should write to. Files are shared,
+    in memory strings are not.
+    """
+    if isinstance(self._sink,StringSink):
+      return StringSink(self._sink.flush_size)
+    return self._sink
   def _update_col_widths(self):
     """
     This looks at the length of the static set column widths and the max column
@@ -900,7 +3121,7 @@ class Table:
         col_diff=col_set_count - col_real_count
         new_count=col_set_count
         count=0
-        i=col_set_count-1
+        i=col_real_count
         while count < col_diff:
           self.col_widths_real.append(self.col_widths[i])
           i+=1
@@ -934,28 +3155,73 @@ class Table:
         width+=self.col_widths_real[count]
       count+=1
     self.data_max_width=width
-  def _row_col_width_adjust(self,row):
+  def _row_col_width_adjust(self,row,data=False):
     """
     This is usually called after a new row is inserted and updates
     col_widths_real incase columns need to be expanded etc.. 
+
+    Only the columns that grew are touched, and data_max_width is kept as a
+    running total. The full recalculation (_update_data_max_width) is only
+    needed when col_widths and col_widths_real are out of step, which is
+    after set_col_widths changes things.
     
     Args:
       row:      List where each element is a cell
+      data:     The row was stored in the table (rather than being the
+                column names or an adhoc row), so col_widths_data is
+                updated too. Default=False
+    """
+    try:
+      lens=list(map(len,row))
+    except TypeError:
+      lens=[len(c) if isinstance(c,str) else len(str(c)) for c in row]
+    self._merge_col_widths(lens)
+    #Most rows don't widen any column, so only check for that per row
+    if data and (len(lens) > len(self.col_widths_data) or any(map(gt,lens,self.col_widths_data))):
+      self._merge_data_widths(lens)
+  def _merge_data_widths(self,lens):
+    """
+    Merge the widths of stored rows into col_widths_data
+
+    Args:
+      lens:     List of widths, one per column
+    """
+    widths=self.col_widths_data
+    if len(lens) > len(widths):
+      widths.extend(repeat(0,len(lens)-len(widths)))
+    self.col_widths_data=list(map(max,widths,lens))+widths[len(lens):]
+  def _merge_col_widths(self,lens):
+    """
+    Does the work for _row_col_width_adjust, taking the width of each cell.
+    Also used to merge in the widths of a batch of rows or of another table.
+
+    Args:
+      lens:     List of widths, one per column
     """
     count=0
-    col_widths_real_count=len(self.col_widths_real)
-    for c in row:
-      try:
-        c_len=len(c)
-      except TypeError:
-        c_len=len(str(c))
+    widths=self.col_widths_real
+    set_widths=self.col_widths
+    col_widths_real_count=len(widths)
+    synced=len(set_widths) == col_widths_real_count
+    grow=0
+    for c_len in lens:
       if count < col_widths_real_count:
-        if c_len > self.col_widths_real[count]:
-          self.col_widths_real[count]=c_len
+        if c_len > widths[count]:
+          if synced and set_widths[count] <= 0:
+            grow+=c_len-widths[count]
+          widths[count]=c_len
       else:
-        self.col_widths_real.append(c_len)
+        widths.append(c_len)
+        if synced:
+          set_widths.append(0)
+          grow+=c_len
       count+=1
-    self._update_data_max_width()
+    if not synced:
+      self._update_data_max_width()
+      return
+    if len(widths) != col_widths_real_count:
+      self.col_count=len(widths)
+    self.data_max_width+=grow
   ####These are the externally supported functions####
   def copy(self):
     """
@@ -964,19 +3230,41 @@ class Table:
     Returns:
       Table
     """
-    new_table=Table()
-    new_table.rows=list(self.rows)
-    new_table.row_colorization=list(self.row_colorization)
-    new_table.row_render_opts=list(self.row_render_opts)
+    if self.concurrent:
+      with self._merge_lock:
+        self._merge_all()
+        return self._copy()
+    return self._copy()
+  def _copy(self):
+    """
+    Does the work for copy()
+    """
+    new_table=Table(storage=self._derived_storage(),max_rows=self.max_rows,max_age=self.max_age)
+    if self._ring:
+      new_table.rows=_RingRows(self.rows)
+      new_table.row_colorization=_RingRows(self.row_colorization)
+      new_table.row_render_opts=_RingRows(self.row_render_opts)
+      new_table._ring_times=deque(self._ring_times)
+      new_table._ring_newest=self._ring_newest
+      new_table._ring_widths=[dict(counts) for counts in self._ring_widths]
+    elif self._store is None:
+      new_table.rows=list(self.rows)
+      new_table.row_colorization=list(self.row_colorization)
+      new_table.row_render_opts=list(self.row_render_opts)
+    else:
+      new_table._set_store(self._store.copy())
+      new_table.storage=self.storage
     new_table.col_widths=list(self.col_widths)
     new_table.col_widths_real=list(self.col_widths_real)
+    new_table.col_widths_data=list(self.col_widths_data)
     new_table.data_max_width=int(self.data_max_width)
     new_table.data_cur_max_width=int(self.data_cur_max_width)
     new_table.col_names=list(self.col_names)
     new_table.col_count=int(self.col_count)
     new_table.renderer=self.renderer.copy()
-    new_table._output_file=self._output_file
-    new_table.color_disabled=bool(self.color_disabled)
+    new_table._sink=self._copy_sink()
+    for index in self.indexes:
+      new_table.create_index(index.col,index.kind)
     return new_table
   def empty_output(self):
     """
@@ -984,10 +3272,28 @@ class Table:
     will store the table in memory at self.built_buffer. This function empties
     that buffer.
     """
-    if self._output_file:
-      return
-    else:
-      self.built_buffer=''
+    if isinstance(self._sink,StringSink):
+      self._sink.clear()
+  def flush_output(self):
+    """
+    Write out anything still pending in the output sink. render() does this
+    itself, it is mostly needed for adhoc tables written to a buffered sink.
+    """
+    self._sink.flush()
+  @property
+  def built_buffer(self):
+    """
+    String with everything rendered so far, when the table was created with
+    output='String' (or a StringSink). Otherwise an empty string.
+    """
+    if isinstance(self._sink,StringSink):
+      return self._sink.getvalue()
+    return ''
+  @built_buffer.setter
+  def built_buffer(self,value):
+    if isinstance(self._sink,StringSink):
+      self._sink.clear()
+      self._sink.write(value)
   def set_table_renderer(self,renderer):
     """
     Change the renderer for the table to the new rendere.
@@ -1001,16 +3307,160 @@ class Table:
       self.renderer=renderer
     except AttributeError:
       raise AttributeError("Renderer passed does not appear to be a proper Render object")
-  def render(self):
+  def iter_render(self,chunk_rows=None,offset=0,limit=None,widths='global'):
+    """
+    Render the table using the renderer, a chunk at a time. Renderers without
+    an iter_table function produce a single chunk from print_table.
+    
+    Args:
+      chunk_rows: Number of rows to render per chunk. Default is the
+                  renderer's def_chunk_rows
+      offset:     Index of the first row to render. Default=0
+      limit:      Max number of rows to render. Default=None (all)
+      widths:     'global' to use the column widths of the whole table, or
+                  'page' to size columns to just the rendered rows.
+                  Default='global'
+
+    Returns:
+      Generator of Strings
+    """
+    table=self._render_source(offset,limit,widths)
+    if not hasattr(self.renderer,'iter_table'):
+      yield self.renderer.print_table(table=table)
+    elif chunk_rows is None:
+      for chunk in self.renderer.iter_table(table):
+        yield chunk
+    else:
+      for chunk in self.renderer.iter_table(table,chunk_rows=chunk_rows):
+        yield chunk
+  def render(self,chunk_rows=None,offset=0,limit=None,widths='global'):
+    """
+    Render the table using the renderer. The table is written to the output
+    as it is rendered, in chunks of chunk_rows rows, so the full rendered
+    table never has to be held in memory.
+    
+    Args:
+      chunk_rows: Number of rows to render per chunk. Default is the
+                  renderer's def_chunk_rows
+      offset:     Index of the first row to render. Default=0
+      limit:      Max number of rows to render. Default=None (all)
+      widths:     'global' to use the column widths of the whole table, or
+                  'page' to size columns to just the rendered rows.
+                  Default='global'
+    """
+    write_table=getattr(self.renderer,'write_table',None)
+    if write_table and isinstance(self._sink,FileSink) and not offset and limit is None and widths == 'global':
+      #The renderer can write straight to the output file
+      self._sink.flush()
+      if write_table(self._render_source(),self._sink.output):
+        return
+    for chunk in self.iter_render(chunk_rows,offset,limit,widths):
+      self._output(chunk)
+    self._sink.flush()
+  def page(self,n,size,widths='global'):
+    """
+    Render one page of the table. Only the rows on the page are rendered.
+
+    Args:
+      n:        Page number, starting at 1
+      size:     Number of rows per page
+      widths:   'global' to use the column widths of the whole table so all
+                pages line up, or 'page' to size columns to just the rows on
+                the page. Default='global'
+
+    Returns:
+      String
+    """
+    if n < 1:
+      raise ValueError('Page numbers start at 1')
+    return ''.join(self.iter_render(offset=(n-1)*size,limit=size,widths=widths))
+  def window(self,offset=0,limit=None,widths='global'):
+    """
+    Take a read only view of some of the rows of the table, which can be
+    passed to a renderer like the table itself.
+
+    Args:
+      offset:   Index of the first row. Default=0
+      limit:    Max number of rows. Default=None (all)
+      widths:   'global' or 'page', see page(). Default='global'
+
+    Returns:
+      Table like object
+    """
+    table=self
+    if self.concurrent:
+      table=self.snapshot()
+    return _TableWindow(table,offset,limit,widths)
+  async def render_async(self,writer,chunk_rows=None,encoding='utf-8'):
+    """
+    Render the table to an asyncio stream writer a chunk at a time, waiting
+    on writer.drain() after each chunk so a slow reader holds back rendering
+    and other tasks get to run in between chunks.
+
+    Args:
+      writer:     asyncio.StreamWriter (or anything with write() and a drain()
+                  coroutine)
+      chunk_rows: Number of rows to render per chunk. Default is the
+                  renderer's def_chunk_rows
+      encoding:   Encoding to write chunks in, or None to write them as
+                  strings. Default='utf-8'
+    """
+    import asyncio
+    for chunk in self.iter_render(chunk_rows):
+      if encoding:
+        chunk=chunk.encode(encoding)
+      writer.write(chunk)
+      await writer.drain()
+      #drain() doesn't yield when the buffer is below its limit
+      await asyncio.sleep(0)
+  async def add_rows_async(self,rows,batch_rows=1000):
+    """
+    Add rows from an async iterable, letting other tasks run every
+    batch_rows rows.
+
+    Args:
+      rows:       Async iterable where each item is a list of cells
+      batch_rows: Number of rows to add between giving control back to the
+                  event loop. Default=1000
+    """
+    import asyncio
+    count=0
+    async for cells in rows:
+      self.add_row(cells)
+      count+=1
+      if count >= batch_rows:
+        count=0
+        await asyncio.sleep(0)
+  def merge_pending(self):
+    """
+    On a concurrent table, merge the rows every thread has buffered so far
+    into the table (rows, widths etc...). Needed before reading table.rows
+    directly, len(), filter_table(), copy() etc... already do this. Does
+    nothing on other tables.
+    """
+    if self.concurrent:
+      with self._merge_lock:
+        self._merge_all()
+  def snapshot(self):
     """
-    Render the table using the renderer
+    Take a consistent read only view of the table as it is now, which can be
+    passed to a renderer while other threads keep adding rows. On concurrent
+    tables the buffered rows are merged first. Threads adding rows only wait
+    while the buffers are emptied, not for the merge.
+
+    Returns:
+      Table like object
     """
-    self._output(self.renderer.print_table(table=self))
+    if self.concurrent:
+      with self._merge_lock:
+        self._merge_all()
+        return _TableSnapshot(self)
+    return _TableSnapshot(self)
   def print_header(self):
     """
     Render just the header of the table
     """
-    self._output(self.renderer.print_header(self))
+    self._output(_render_phases(self.renderer,self)[0](self))
   def print_row(self,cells,colors=None):
     """
     Render a single passed row without adding to memory, this is how
@@ -1030,12 +3480,209 @@ class Table:
     Render the footer of the table, useful with adhoc tables
     """
     if self.renderer.type_spec == 'text':
-      self._output(self.renderer.print_footer(self))
+      self._output(_render_phases(self.renderer,self)[2](self))
   def print_table(self):
     """
     Render the Table, this is provided for backward compatibility
     """
     self.render()
+  stats_phases=('add_row','add_rows','_row_col_width_adjust','_output')
+  def enable_stats(self,hook=None):
+    """
+    Start counting calls and timing where the time goes, which stats()
+    returns. The phases are add_row, add_rows, _check_row (the table filter
+    row rules), _row_col_width_adjust, each renderer's print_header,
+    print_rows and print_footer, and _output (writes to the output). When
+    RenderCSV with csv_writer writes straight to a file it formats and writes
+    rows in one call, which is counted as both print_rows and _output. This is
+    done by swapping in timed versions of those functions, so tables without
+    stats enabled run the same code as before and aren't slowed down.
+    Enabling stats again keeps the counts, but changes the hook.
+
+    Args:
+      hook:   Function called with (phase,seconds) after every timed call,
+              for exporting to metrics. Keep it quick, as it is called for
+              every row added. Default=None
+    """
+    if self._stats is not None:
+      self._stats.hook=hook
+      return
+    self._stats=TableStats(hook)
+    for phase in self.stats_phases:
+      setattr(self,phase,self._stats.wrap(phase,getattr(self,phase)))
+    if self.table_filter:
+      self.table_filter=_TimedFilter(self.table_filter,self._stats)
+  def disable_stats(self):
+    """
+    Stop counting and timing, and drop the stats collected so far
+    """
+    if self._stats is None:
+      return
+    for phase in self.stats_phases:
+      del self.__dict__[phase]
+    if isinstance(self.table_filter,_TimedFilter):
+      self.table_filter=self.table_filter._table_filter
+    self._stats=None
+  def stats(self,reset=False):
+    """
+    Returns the counts and cumulative timings collected since enable_stats()
+    was called. For example:
+      {'add_row': {'calls': 1000, 'seconds': 0.0042}, ...}
+
+    Args:
+      reset:  Zero the counters after reading them. Default=False
+
+    Returns:
+      Dictionary of phase name to a dictionary with calls and seconds, empty
+      when stats aren't enabled
+    """
+    if self._stats is None:
+      return dict()
+    stats=self._stats.as_dict()
+    if reset:
+      self._stats.reset()
+    return stats
+  def sort_by(self,cols,reverse=False,types=None,budget_rows=None):
+    """
+    Sort the rows of the table, keeping their colors and renderer options
+    with them. Cells are compared as numbers, dates or strings, picked per
+    column the same way TableFilter row rules type their comparison value:
+    a column where every cell is a number is sorted as numbers, otherwise
+    one where every cell is a date is sorted by date, otherwise as strings.
+    Empty cells always sort after the rest (before them when reversed). The
+    sort keys are worked out once per row, and the sort is stable.
+
+    Tables with more than budget_rows rows are sorted in runs of budget_rows
+    rows that are written to temporary files and then merged.
+
+    Args:
+      cols:         Column id or list of column ids to sort on (starting at
+                    1, same as in TableFilter rules)
+      reverse:      Sort in descending order. Default=False
+      types:        List of 'number', 'date' or 'string', one per column in
+                    cols, to skip working out the column types. Default=None
+      budget_rows:  Max rows to sort in memory at once. Default is
+                    sort_budget_rows
+    """
+    if self._ring or self.storage == 'mapped':
+      raise ValueError("Tables with max_rows or max_age, or over a mapped file, can't be sorted, extend() another Table with it and sort that instead")
+    if isinstance(cols,int):
+      cols=[cols]
+    cols=[int(c)-1 for c in cols]
+    if min(cols) < 0:
+      raise ValueError('Column ids start at 1')
+    if types is None:
+      types=[None]*len(cols)
+    elif len(types) != len(cols):
+      raise ValueError('types needs one entry per sort column')
+    for val_type in types:
+      if val_type not in (None,'number','date','string'):
+        raise ValueError("Sort types must be one of: 'number', 'date', 'string'")
+    if budget_rows is None:
+      budget_rows=self.sort_budget_rows
+    if self.concurrent:
+      with self._merge_lock:
+        self._merge_all()
+        self._sort_rows(cols,reverse,types,budget_rows)
+    else:
+      self._sort_rows(cols,reverse,types,budget_rows)
+  def _sort_rows(self,cols,reverse,types,budget_rows):
+    """
+    Does the work for sort_by()
+    """
+    types=[val_type or self._sort_type(col) for col,val_type in zip(cols,types)]
+    key=_sort_key(cols,types)
+    entries=zip(self.rows,self.row_colorization,self.row_render_opts)
+    if len(self.rows) > budget_rows:
+      ordered=_external_sort(entries,key,reverse,budget_rows)
+    else:
+      decorated=[(key(cells),cells,colors,opts) for cells,colors,opts in entries]
+      decorated.sort(key=itemgetter(0),reverse=reverse)
+      ordered=decorated
+    if self._store is None:
+      rows=[]
+      row_colorization=[]
+      row_render_opts=[]
+      for sort_key,cells,colors,opts in ordered:
+        rows.append(cells)
+        row_colorization.append(colors)
+        row_render_opts.append(opts)
+      self.rows=rows
+      self.row_colorization=row_colorization
+      self.row_render_opts=row_render_opts
+      self._rows_changed()
+    else:
+      store=ColumnStore()
+      ordered=iter(ordered)
+      while True:
+        batch=list(islice(ordered,self.add_batch_rows))
+        if not batch:
+          break
+        store.extend([list(e[1]) for e in batch],[e[2] for e in batch],[e[3] for e in batch])
+      self._set_store(store)
+    #Row positions moved, so indexes have to start over
+    self.indexes=[ColumnIndex(index.col,index.kind) for index in self.indexes]
+  def _sort_type(self,col):
+    """
+    Work out whether a column sorts as numbers, dates or strings
+
+    Args:
+      col:    Column index (starting at 0)
+
+    Returns:
+      String, one of 'number', 'date', 'string'
+    """
+    for val_type in ('number','date'):
+      if all(c == '' or _typed_value(val_type,c) is not None for c in _column_cells(self.rows,col)):
+        return val_type
+    return 'string'
+  def group_by(self,key_cols,table_filter=None):
+    """
+    Group the rows of the table on one or more key columns, to summarize
+    them. For example:
+      summary=my_table.group_by(1).agg({3: 'sum', 4: ['min','max']})
+
+    Args:
+      key_cols:       Column id or list of column ids to group on (starting
+                      at 1, same as in TableFilter rules)
+      table_filter:   Optional TableFilter, only rows passing its row rules
+                      are aggregated. Default=None
+
+    Returns:
+      TableGroupBy
+    """
+    return TableGroupBy(self,key_cols,table_filter)
+  def create_index(self,col,kind='hash'):
+    """
+    Create a secondary index over a column, so TableFilter rules on that
+    column only have to look at matching rows instead of the whole table.
+    The index is kept up to date as rows are added.
+
+    Args:
+      col:    Column id (starting at 1, same as in TableFilter rules)
+      kind:   'hash' for '=' and '!=' rules, or 'sorted' which also handles
+              '<', '<=', '>' and '>=' rules. Default='hash'
+
+    Returns:
+      ColumnIndex
+    """
+    if self._ring:
+      raise ValueError("Tables with max_rows or max_age can't have indexes")
+    new_index=ColumnIndex(col,kind)
+    for index in self.indexes:
+      if index.col == new_index.col and index.kind == new_index.kind:
+        return index
+    self.indexes.append(new_index)
+    return new_index
+  def drop_index(self,col,kind=None):
+    """
+    Remove the indexes over a column
+
+    Args:
+      col:    Column id (starting at 1)
+      kind:   Only drop the index of this kind. Default=None (all kinds)
+    """
+    self.indexes=[i for i in self.indexes if not (i.col == int(col) and kind in (None,i.kind))]
   def set_col_widths(self,col_widths):
     """
     This sets a hard static column length.  A column of size 0 or '' will 
@@ -1072,17 +3719,8 @@ class Table:
       c=self.table_filter._filter_cols(col_names)
       col_names=c
     cell_count=len(col_names)
-    tmp_col_names=[]
-    count=0
-    for n in col_names:
-      cell_len=len(str(n))
-      tmp_col_names.append(str(n))
-      if count < len(self.col_widths_real):
-        if cell_len > self.col_widths_real[count]:
-          self.col_widths_real[count]=cell_len
-      else:
-        self.col_widths_real.append(cell_len)
-      count+=1
+    tmp_col_names=[str(n) for n in col_names]
+    count=cell_count
     if cell_count > self.col_count:
       self.col_count=cell_count
     while count != self.col_count:
@@ -1107,8 +3745,11 @@ class Table:
                         html_cell_attr: List of HTML cell attribute/s to add to
                                     'td'/'th' tags
     """
+    if self.storage == 'mapped':
+      #Checked before anything (col_count etc...) gets changed
+      raise TypeError('Tables over a mapped file are read only')
     if self.table_filter:
-      if self.table_filter._check_row(cells):
+      if self.table_filter._row_predicate()(cells):
         c=self.table_filter._filter_cols(cells)
         if color_cells:
           cc=self.table_filter._filter_cols(color_cells)
@@ -1118,18 +3759,23 @@ class Table:
         return
       cells=c
       color_cells=cc
+    if self.concurrent:
+      self._buffer_row(cells,color_cells,renderer_opts)
+    else:
+      self._store_row(cells,color_cells,renderer_opts)
+  def _store_row(self,cells,color_cells,renderer_opts):
+    """
+    Does the work for add_row() once the row made it through the filter:
+    pads short rows, stores it and updates the column widths
+    """
     cell_count=len(cells)
     if cell_count > self.col_count:
       self.col_count=cell_count
-      self.rows.append(cells)
-      self.row_colorization.append(color_cells)
-      self.row_render_opts.append(renderer_opts)
-      self._row_col_width_adjust(cells)
+      self._append_row(cells,color_cells,renderer_opts)
+      self._row_col_width_adjust(cells,True)
     elif cell_count == self.col_count:
-      self.rows.append(cells)
-      self.row_colorization.append(color_cells)
-      self.row_render_opts.append(renderer_opts)
-      self._row_col_width_adjust(cells)
+      self._append_row(cells,color_cells,renderer_opts)
+      self._row_col_width_adjust(cells,True)
     else:
       cells_filled=[]
       count=0
@@ -1139,10 +3785,245 @@ class Table:
       while count != self.col_count:
         cells_filled.append('')
         count+=1
-      self.rows.append(cells_filled)
-      self.row_colorization.append(color_cells)
-      self.row_render_opts.append(renderer_opts)
-      self._row_col_width_adjust(cells_filled)
+      self._append_row(cells_filled,color_cells,renderer_opts)
+      self._row_col_width_adjust(cells_filled,True)
+    if self._ring:
+      self._ring_evict()
+  def add_rows(self,rows,colors=None,renderer_opts=None):
+    """
+    Add many rows to the table in memory. This ends up the same as calling
+    add_row() for each row, but the filter, padding and column width work is
+    done a batch of add_batch_rows rows at a time.
+
+    Args:
+      rows:           Iterable where each element is a list of cells
+      colors:         Iterable where each element is the color_cells list for
+                      the row at the same position. Default=None
+      renderer_opts:  Iterable where each element is the renderer_opts dict
+                      for the row at the same position (see add_row).
+                      Default=None
+    """
+    if self.storage == 'mapped':
+      raise TypeError('Tables over a mapped file are read only')
+    rows=iter(rows)
+    colors=repeat([]) if colors is None else iter(colors)
+    renderer_opts=repeat(None) if renderer_opts is None else iter(renderer_opts)
+    while True:
+      cells_batch=list(islice(rows,self.add_batch_rows))
+      if not cells_batch:
+        break
+      count=len(cells_batch)
+      colors_batch=list(islice(colors,count))
+      if len(colors_batch) < count:
+        colors_batch.extend(repeat([],count-len(colors_batch)))
+      opts_batch=list(islice(renderer_opts,count))
+      if len(opts_batch) < count:
+        opts_batch.extend(repeat(None,count-len(opts_batch)))
+      if self.table_filter:
+        cells_batch,colors_batch,opts_batch=self._filter_batch(cells_batch,colors_batch,opts_batch)
+      if self.concurrent:
+        with self._merge_lock:
+          self._store_rows(cells_batch,colors_batch,opts_batch)
+      else:
+        self._store_rows(cells_batch,colors_batch,opts_batch)
+  def extend(self,other):
+    """
+    Add all the rows of another table to this one. Unless this table has a
+    filter the rows are copied as they are, in batches of add_batch_rows, and
+    the widths of the other table's rows (col_widths_data) are merged in
+    once instead of being worked out again row by row. As with add_row(),
+    the other table's column names don't widen this one.
+
+    Args:
+      other:    Table to add the rows of
+    """
+    if self.storage == 'mapped':
+      raise TypeError('Tables over a mapped file are read only')
+    other.merge_pending()
+    if self.table_filter or self.concurrent or self._ring:
+      self.add_rows(other.rows,other.row_colorization,other.row_render_opts)
+      return
+    rows=iter(other.rows)
+    colors=iter(other.row_colorization)
+    renderer_opts=iter(other.row_render_opts)
+    no_colors=[] #Shared by the rows without colors, as add_row's default is
+    while True:
+      cells_batch=list(islice(rows,self.add_batch_rows))
+      if not cells_batch:
+        break
+      count=len(cells_batch)
+      colors_batch=list(islice(colors,count))
+      opts_batch=list(islice(renderer_opts,count))
+      if self._store is None:
+        #Copied so the two tables don't share row lists (columnar tables
+        #hand back tuples, which get turned into lists too)
+        cells_batch=list(map(list,cells_batch))
+        colors_batch=[list(c) if c else no_colors for c in colors_batch]
+        opts_batch=[dict(o) if o else o for o in opts_batch]
+      self._store_rows(cells_batch,colors_batch,opts_batch,False)
+    self._merge_col_widths(other.col_widths_data)
+    self._merge_data_widths(other.col_widths_data)
+  def _filter_batch(self,cells_batch,colors_batch,opts_batch):
+    """
+    Apply the table filter to a batch of rows
+
+    Returns:
+      Tuple of (cells, colors, renderer opts) lists for the rows that passed
+    """
+    keep=list(map(self.table_filter._row_predicate(),cells_batch))
+    filter_cols=self.table_filter._filter_cols
+    cells_batch=[filter_cols(cells) for cells in compress(cells_batch,keep)]
+    colors_batch=[filter_cols(colors) if colors else colors for colors in compress(colors_batch,keep)]
+    opts_batch=list(compress(opts_batch,keep))
+    return (cells_batch,colors_batch,opts_batch)
+  def _store_rows(self,cells_batch,colors_batch,opts_batch,adjust_widths=True):
+    """
+    Does the work for add_rows() once a batch of rows made it through the
+    filter: pads short rows, stores them and updates the column widths
+
+    Args:
+      cells_batch:    List of rows
+      colors_batch:   List of color_cells, one per row
+      opts_batch:     List of renderer_opts, one per row
+      adjust_widths:  Work out the column widths from the rows. Default=True
+    """
+    if not cells_batch:
+      return
+    col_count=self.col_count
+    lengths=list(map(len,cells_batch))
+    if not (min(lengths) == max(lengths) >= col_count):
+      #Same as add_row(), short rows get padded to the column count there was
+      #when they were added
+      padded=[]
+      for cells,cell_count in zip(cells_batch,lengths):
+        if cell_count > col_count:
+          col_count=cell_count
+        elif cell_count < col_count:
+          cells=[str(c) for c in cells]
+          cells.extend(repeat('',col_count-cell_count))
+        padded.append(cells)
+      cells_batch=padded
+      lengths=list(map(len,cells_batch))
+    self.col_count=max(col_count,lengths[0])
+    pos=len(self.rows)
+    if self._store is None:
+      self.rows.extend(cells_batch)
+      self.row_colorization.extend(colors_batch)
+      self.row_render_opts.extend(opts_batch)
+    else:
+      self._store.extend(cells_batch,colors_batch,opts_batch)
+    self.version+=len(cells_batch)
+    if self._ring:
+      for cells in cells_batch:
+        self._ring_track(cells)
+    for index in self.indexes:
+      for row_pos,cells in enumerate(cells_batch,pos):
+        index.add(row_pos,cells)
+    if adjust_widths:
+      if min(lengths) == max(lengths):
+        #Going down each column with itemgetter doesn't create any tuples,
+        #which keeps the garbage collector out of it
+        cols=(map(itemgetter(i),cells_batch) for i in range(lengths[0]))
+      else:
+        cols=zip_longest(*cells_batch,fillvalue='')
+      lens=[]
+      for col in cols:
+        col=list(col)
+        try:
+          lens.append(max(map(len,col)))
+        except TypeError:
+          lens.append(max(len(c) if isinstance(c,str) else len(str(c)) for c in col))
+      self._merge_col_widths(lens)
+      self._merge_data_widths(lens)
+    if self._ring:
+      self._ring_evict()
+
+_date_epoch=None
+def _get_date_epoch():
+  """
+  Returns the memoized date parsing function, building it on first use so
+  that importing this module stays fast (re, datetime, functools and
+  dateutil are only loaded once a date actually needs parsing).
+
+  The returned function converts a date to seconds since the epoch. Common
+  ISO-8601 shapes are parsed directly, anything else is handed to dateutil.
+  Dates without a timezone are read as local time. Results (including
+  failures) are memoized, as tables tend to repeat the same timestamps a lot.
+
+  Returns:
+    Function taking a date string and returning a Float, or None if the
+    value isn't a date
+  """
+  global _date_epoch
+  if _date_epoch is not None:
+    return _date_epoch
+  import re
+  from datetime import datetime
+  from functools import lru_cache
+  #ISO-8601 like dates: 2014-07-30, 20140730, 2014-07-30 12:00:00,
+  # 2014-07-30T12:00:00.123+02:00, 20140801 4:00:00 etc...
+  fast_date_re=re.compile(r'(\d{4})(-?)(\d{2})\2(\d{2})(?:[T ](\d{1,2}):(\d{2})(?::(\d{2})(?:[.,](\d{1,6}))?)?)?(Z|[+-]\d{2}(?::?\d{2})?)?$')
+  epoch_dt=datetime(1970,1,1)
+  @lru_cache(maxsize=65536)
+  def date_epoch(value):
+    try:
+      m=fast_date_re.match(value)
+      if m:
+        year,sep,month,day,hour,minute,sec,frac,tz=m.groups()
+        d=datetime(int(year),int(month),int(day),int(hour or 0),int(minute or 0),int(sec or 0))
+        if tz:
+          epoch=(d-epoch_dt).total_seconds()
+          if tz != 'Z':
+            tz_min=int(tz[1:3])*60
+            if len(tz) > 3:
+              tz_min+=int(tz[-2:])
+            if tz[0] == '+':
+              epoch-=tz_min*60
+            else:
+              epoch+=tz_min*60
+        else:
+          epoch=d.timestamp()
+        if frac:
+          epoch+=float('0.'+frac)
+        return epoch
+      from dateutil.parser import parse as dateparse
+      return dateparse(value).timestamp()
+    except (ValueError,OverflowError,TypeError):
+      return None
+  _date_epoch=date_epoch
+  return _date_epoch
+
+def _date_to_epoch(value):
+  """
+  Convert a date string to seconds since the epoch
+
+  Args:
+    value:    String containing a date
+
+  Returns:
+    Float
+  """
+  epoch=_get_date_epoch()(value)
+  if epoch is None:
+    raise ValueError("Unable to parse date: %s" % (value))
+  return epoch
+
+_numpy=None
+def _import_numpy():
+  """
+  Import NumPy on first use
+
+  Returns:
+    The numpy module, or False when it isn't installed
+  """
+  global _numpy
+  if _numpy is None:
+    try:
+      import numpy
+      _numpy=numpy
+    except ImportError:
+      _numpy=False
+  return _numpy
 
 class CustomOp:
   """
@@ -1185,13 +4066,32 @@ class TableFilter:
                         This can be a string, number, or even a date.
   Args:
     filter_txt:         String following Filter Expression Syntax above
-  
+    use_numpy:          Whether filter_table should evaluate row rules as
+                        NumPy vectorized masks over whole columns (needs
+                        NumPy installed). None picks automatically: columnar
+                        tables with at least numpy_min_rows rows, as their
+                        columns convert to arrays cheaply. Default=None
   """
   row_ops=[ '>=','<=','>','<','!=','=','!/','/' ]
-  def __init__(self,filter_txt=None):
+  numpy_min_rows=50000
+  #Python expressions used for each operator by _compile_rules, 'v' is the
+  # coerced cell value and 'val' the rule's comparison value
+  _op_exprs={ '>': '%(v)s > %(val)s',
+              '>=': '%(v)s >= %(val)s',
+              '<': '%(v)s < %(val)s',
+              '<=': '%(v)s <= %(val)s',
+              '!=': '%(v)s != %(val)s',
+              '=': '%(v)s == %(val)s',
+              '/': '%(val)s in %(v)s',
+              '!/': '%(val)s not in %(v)s',
+            }
+  def __init__(self,filter_txt=None,use_numpy=None):
+    self.use_numpy=use_numpy
     self.row_rules=[]
+    self._predicate=None
     self.col_rule=[]
     self.col_rule_len=0
+    self._col_plan=None
     if filter_txt:
       self._parse_filter_txt(filter_txt)
   #Functions that are somewhat private
@@ -1220,6 +4120,52 @@ class TableFilter:
         self.add_row_rule(f_split[0])
     for i in range(1,rule_cnt):
       self.add_row_rule(f_split[i])
+  def _compile_rules(self):
+    """
+    Compiles self.row_rules into a single function that checks a row against
+    all of them. Column indices, value coercions and comparisons are baked
+    into the generated code, and each column is only coerced once per type.
+    A row that can't be coerced (or is too short) fails the check, the same
+    as with the individual rules.
+
+    Returns:
+      Function taking a row (list of cells) and returning True/False
+    """
+    if not self.row_rules:
+      return lambda row: True
+    coercions={'date': '_date_epoch(%s)', 'number': 'float(%s)', 'string': 'str(%s)'}
+    namespace=dict()
+    if any(rule['val_type'] == 'date' for rule in self.row_rules):
+      namespace['_date_epoch']=_get_date_epoch()
+    lines=['def _check_row(row):','  try:']
+    coerced=dict()
+    count=0
+    for rule in self.row_rules:
+      key=(rule['col'],rule['val_type'])
+      if key not in coerced:
+        coerced[key]='c%d' % (len(coerced))
+        lines.append('    %s=%s' % (coerced[key],coercions[rule['val_type']] % ('row[%d]' % (rule['col']-1))))
+        if rule['val_type'] == 'date':
+          lines.append('    if %s is None:' % (coerced[key]))
+          lines.append('      return False')
+      val_name='val%d' % (count)
+      namespace[val_name]=rule['val']
+      expr=self._op_exprs[rule['op_str']] % {'v': coerced[key], 'val': val_name}
+      lines.append('    if not (%s):' % (expr))
+      lines.append('      return False')
+      count+=1
+    lines.append('  except Exception:')
+    lines.append('    return False')
+    lines.append('  return True')
+    exec('\n'.join(lines),namespace)
+    return namespace['_check_row']
+  def _row_predicate(self):
+    """
+    Returns the compiled row rules, compiling them if needed.
+    """
+    if self._predicate is None:
+      self._predicate=self._compile_rules()
+    return self._predicate
   def _check_row(self,row):
     """
     Checks a row of cells against the current rules in self.row_rules
@@ -1230,19 +4176,35 @@ class TableFilter:
     Returns:
       True/False
     """
-    for rule in self.row_rules:
-      try:
-        if rule['val_type'] == 'date':
-          v=float(dateparse(row[rule['col']-1]).strftime('%s'))
-        elif rule['val_type'] == 'number':
-          v=float(row[rule['col']-1])
-        else:
-          v=str(row[rule['col']-1])
-        if not rule['op'](v):
-          return False
-      except:
-        return False
-    return True
+    return self._row_predicate()(row)
+  def _plan_cols(self):
+    """
+    Work out how _filter_cols can pick the columns of the col_rule out of
+    rows that have all of them.
+
+    Returns:
+      Tuple of (function returning a list of the explicit columns of a row,
+      number of cells a row needs, index the end range starts at or None),
+      or None if the rule can't be planned
+    """
+    if self.col_rule_len == 0:
+      return None
+    indices=list(self.col_rule)
+    tail=None
+    if indices[-1] == '-':
+      tail=indices[-2]-1
+      indices=indices[:-2]
+    indices=[c-1 for c in indices]
+    if [c for c in indices if c < 0] or (tail is not None and tail < 0):
+      return None
+    need=max(indices+[tail if tail is not None else -1])+1
+    if len(indices) > 1:
+      getter=lambda row,pick=itemgetter(*indices): list(pick(row))
+    elif indices:
+      getter=lambda row,i=indices[0]: [row[i]]
+    else:
+      getter=lambda row: []
+    return (getter,need,tail)
   def _filter_cols(self,cols):
     """
     Filters a list of cells according to the col_rule
@@ -1257,28 +4219,30 @@ class TableFilter:
     e_r=self.col_rule_len
     if e_r == 0:
       return cols
+    if self._col_plan and len(cols) >= self._col_plan[1]:
+      #Every column in the rule is there, so just pick them out
+      getter,need,tail=self._col_plan
+      filter_cols=getter(cols)
+      if tail is not None:
+        filter_cols.extend(cols[tail:])
+      return filter_cols
     filter_cols=[]
+    cc_len=len(cols)
+    if cc_len == 0:
+      return filter_cols
     if self.col_rule[-1] == '-':
       end_range=True
       e_r-=2
     for i in range(0,e_r):
       c=self.col_rule[i]-1
-      try:
+      if -cc_len <= c < cc_len:
         filter_cols.append(cols[c])
-      except IndexError:
-        pass
     if end_range:
-      try:
-        filter_cols.append(cols[self.col_rule[-2]-1])
-      except IndexError:
-        pass
-      try:
-        cc_len=len(cols)
-        if cc_len > self.col_rule[-2]:
-          for i in range(self.col_rule[-2],cc_len):
-            filter_cols.append(cols[i])
-      except IndexError:
-        pass
+      c=self.col_rule[-2]-1
+      if -cc_len <= c < cc_len:
+        filter_cols.append(cols[c])
+      if cc_len > self.col_rule[-2]:
+        filter_cols.extend(cols[self.col_rule[-2]:cc_len])
     return filter_cols
   def filter_table(self,table):
     """
@@ -1290,18 +4254,257 @@ class TableFilter:
     Returns:
       Table
     """
+    #Rows still buffered by the threads of a concurrent table count too
+    table.merge_pending()
     #Create new Table object
-    new_table=Table(renderer=table.renderer.copy())
-    new_table._output_file=table._output_file
+    new_table=Table(renderer=table.renderer.copy(),storage=table._derived_storage())
+    new_table._sink=table._copy_sink()
     new_table.set_col_names(self._filter_cols(table.col_names))
+    candidates=self._index_candidates(table)
+    if candidates is not None:
+      check_row=self._row_predicate()
+      rows=table.rows
+      colorization=table.row_colorization
+      for i in candidates:
+        r=rows[i]
+        if check_row(r):
+          new_table.add_row(self._filter_cols(r),self._filter_cols(colorization[i]))
+      return new_table
+    if self.use_numpy is None:
+      use_numpy=table.storage == 'columnar' and len(table) >= self.numpy_min_rows
+    else:
+      use_numpy=self.use_numpy
+    if self.row_rules and use_numpy:
+      np=_import_numpy()
+      if np:
+        self._filter_table_numpy(table,new_table,np)
+        return new_table
     #Filter the table and only add the rows with needed columns to the new
     # object
-    r_cnt=0
-    for r in table.rows:
-      if self._check_row(r):
-        new_table.add_row(self._filter_cols(r),self._filter_cols(table.row_colorization[r_cnt]))
-      r_cnt+=1
+    check_row=self._row_predicate()
+    for r,colors in zip(table.rows,table.row_colorization):
+      if check_row(r):
+        new_table.add_row(self._filter_cols(r),self._filter_cols(colors))
     return new_table
+  def _index_candidates(self,table):
+    """
+    Use the ColumnIndexes of table to narrow down which rows can match the
+    row rules.
+
+    Args:
+      table:    Table object being filtered
+
+    Returns:
+      Sorted list of row positions, or None if no index could be used
+    """
+    if not table.indexes:
+      return None
+    table.merge_pending()
+    candidates=None
+    for rule in self.row_rules:
+      for index in sorted(table.indexes,key=lambda i: i.kind != 'hash'):
+        if index.col != rule['col']:
+          continue
+        matches=index.lookup(table.rows,rule['val_type'],rule['op_str'],rule['val'])
+        if matches is None:
+          continue
+        if candidates is None:
+          candidates=set(matches)
+        else:
+          candidates.intersection_update(matches)
+        break
+    if candidates is None:
+      return None
+    return sorted(candidates)
+  def _numpy_column(self,table,col,val_type,np):
+    """
+    Convert a column of table to a NumPy array of val_type values. Cells that
+    don't convert (or rows too short to have the column) are marked invalid,
+    they fail every rule.
+
+    Args:
+      table:    Table object the column is in
+      col:      Index of the column (starting at 0)
+      val_type: One of 'number', 'date', 'string'
+      np:       The numpy module
+
+    Returns:
+      Tuple of (values array, valid bool array)
+    """
+    n=len(table)
+    store=table._store
+    if table.storage == 'columnar':
+      if col >= len(store.columns):
+        return np.zeros(n,dtype=np.float64),np.zeros(n,dtype=bool)
+      column=store.columns[col]
+      if val_type == 'number' and column.kind != 'str':
+        #Numeric columns already are arrays, no conversion needed
+        values=np.frombuffer(column.data,dtype=np.dtype(column.typecode))
+        return values.astype(np.float64),np.ones(n,dtype=bool)
+      cells=list(column)
+    else:
+      try:
+        cells=list(map(itemgetter(col),table.rows))
+      except IndexError:
+        cells=[r[col] if len(r) > col else None for r in table.rows]
+    if val_type == 'string':
+      #Kept as python strings, '=' and '!=' compare them as is and the
+      # contains operators convert them to a unicode array when needed
+      if None in cells:
+        valid=np.array([c is not None for c in cells],dtype=bool)
+        cells=['' if c is None else c for c in cells]
+      else:
+        valid=np.ones(n,dtype=bool)
+      values=np.empty(n,dtype=object)
+      values[:]=[c if c.__class__ is str else str(c) for c in cells]
+      return values,valid
+    if val_type == 'number' and None not in cells:
+      try:
+        return np.array(cells,dtype=np.float64),np.ones(n,dtype=bool)
+      except (ValueError,TypeError):
+        pass
+    if val_type == 'date':
+      date_epoch=_get_date_epoch()
+      converted=[None if c is None else date_epoch(c) for c in cells]
+    else:
+      converted=[]
+      for c in cells:
+        try:
+          converted.append(float(c))
+        except (ValueError,TypeError):
+          converted.append(None)
+    valid=np.array([v is not None for v in converted],dtype=bool)
+    values=np.array([0.0 if v is None else v for v in converted],dtype=np.float64)
+    return values,valid
+  def _filter_table_numpy(self,table,new_table,np):
+    """
+    Vectorized version of filter_table. Each row rule is evaluated as a mask
+    over a whole column, the masks are ANDed together and the matching rows
+    are gathered into new_table in one go, with the column widths computed
+    per column rather than per row. Columnar tables are gathered a column at
+    a time with NumPy, see _take_columns(). Contains rules ('/' and '!/') on
+    number or date values match nothing, same as the row predicate.
+
+    Args:
+      table:      Table object to filter
+      new_table:  Table object (with column names already set) to add the
+                  matching rows to
+      np:         The numpy module
+    """
+    mask=np.ones(len(table),dtype=bool)
+    columns=dict()
+    for rule in self.row_rules:
+      key=(rule['col']-1,rule['val_type'])
+      if key not in columns:
+        columns[key]=self._numpy_column(table,key[0],key[1],np)
+      values,valid=columns[key]
+      op=rule['op_str']
+      val=rule['val']
+      if op == '>':
+        rule_mask=values > val
+      elif op == '>=':
+        rule_mask=values >= val
+      elif op == '<':
+        rule_mask=values < val
+      elif op == '<=':
+        rule_mask=values <= val
+      elif op == '!=':
+        rule_mask=values != val
+      elif op == '=':
+        rule_mask=values == val
+      elif rule['val_type'] != 'string':
+        #Like the row predicate, contains rules only match strings
+        rule_mask=np.zeros(len(table),dtype=bool)
+      elif op == '/':
+        rule_mask=np.fromiter((val in v for v in values),dtype=bool,count=len(values))
+      else:
+        rule_mask=np.fromiter((val not in v for v in values),dtype=bool,count=len(values))
+      mask&=valid
+      mask&=rule_mask
+    if table.storage == 'columnar' and self._take_columns(table,new_table,np.flatnonzero(mask),np):
+      return
+    matches=np.flatnonzero(mask).tolist()
+    rows=table.rows
+    colorization=table.row_colorization
+    kept=[self._filter_cols(rows[i]) for i in matches]
+    kept_colors=[self._filter_cols(colorization[i]) for i in matches]
+    if not kept:
+      return
+    col_count=max(new_table.col_count,max(map(len,kept)))
+    widths=list(new_table.col_widths_real)
+    widths.extend([0]*(col_count-len(widths)))
+    count=0
+    for r in kept:
+      if len(r) < col_count:
+        kept[count]=[str(c) for c in r]+['']*(col_count-len(r))
+      count+=1
+    count=0
+    data_widths=[]
+    for column in zip(*kept):
+      width=max(map(len,map(str,column)))
+      data_widths.append(width)
+      if width > widths[count]:
+        widths[count]=width
+      count+=1
+    for r,colors in zip(kept,kept_colors):
+      new_table._append_row(r,colors,None)
+    new_table.col_widths_real=widths
+    new_table._merge_data_widths(data_widths)
+    new_table.col_count=col_count
+    new_table._update_data_max_width()
+  def _take_columns(self,table,new_table,positions,np):
+    """
+    Gather the matching rows of a columnar table into new_table a column at
+    a time, with one NumPy gather per column and the column widths worked
+    out from the gathered columns.
+
+    Args:
+      table:      Columnar Table object being filtered
+      new_table:  Columnar Table object (with column names already set) to
+                  add the matching rows to
+      positions:  NumPy array of the positions of the matching rows
+      np:         The numpy module
+
+    Returns:
+      True, or False when the column rule needs columns the store doesn't
+      have (those rows are gathered one by one instead)
+    """
+    store=table._store
+    source_cols=self._filter_cols(list(range(len(store.columns))))
+    if new_table.storage != 'columnar' or (self.col_rule_len and len(source_cols) != len(self._filter_cols(list(range(table.col_count))))):
+      return False
+    if not len(positions):
+      return True
+    new_store=new_table._store
+    widths=list(new_table.col_widths_real)
+    widths.extend([0]*(len(source_cols)-len(widths)))
+    count=0
+    data_widths=[]
+    for i in source_cols:
+      new_col,width=store.columns[i].take(positions,np)
+      new_store.columns.append(new_col)
+      data_widths.append(width)
+      if width > widths[count]:
+        widths[count]=width
+      count+=1
+    new_store.row_count=len(positions)
+    if store.colorization:
+      #Colors are sparse, so look up where each colored row ended up
+      colored=np.fromiter(store.colorization,dtype=np.int64,count=len(store.colorization))
+      new_pos=np.searchsorted(positions,colored)
+      kept=new_pos < len(positions)
+      kept[kept]=positions[new_pos[kept]] == colored[kept]
+      for i,pos in zip(colored[kept].tolist(),new_pos[kept].tolist()):
+        colors=self._filter_cols(store.colorization[i])
+        if colors:
+          new_store.colorization[pos]=colors
+    new_table.version+=1
+    new_table.col_widths_real=widths
+    new_table._merge_data_widths(data_widths)
+    new_table.col_count=max(new_table.col_count,len(source_cols))
+    new_table._update_col_widths()
+    new_table._update_data_max_width()
+    return True
   def set_col_rule(self,col_rule):
     """
     Set a column rule for filtering
@@ -1353,6 +4556,7 @@ class TableFilter:
       self.col_rule.append(end_val)
       self.col_rule.append('-')
     self.col_rule_len=len(self.col_rule)
+    self._col_plan=self._plan_cols()
   def add_row_rule(self,row_rule):
     """
     Add a new row rule to the current row_rules
@@ -1394,13 +4598,14 @@ class TableFilter:
         except ValueError:
           #Check to see if the value comparison is against dates
           try:
-            new_rule['val']=float(dateparse(rule_split[1]).strftime('%s'))
+            new_rule['val']=_date_to_epoch(rule_split[1])
             new_rule['val_type']='date'
           except ValueError:
             #Nope, must be a string
             new_rule['val']=rule_split[1]
             new_rule['val_type']='string'
             pass
+        new_rule['op_str']=op
         if new_rule['val_type'] == 'string':
           if op not in [ '=','!=','!/','/' ]:
             raise ValueError("row rule operator: " + op + " is invalid for comparing string values for row rule:"+row_rule)
@@ -1425,6 +4630,149 @@ class TableFilter:
         else:
           raise RuntimeError("You shouldn't have gotten here, op list doesnt match row_ops")
         self.row_rules.append(new_rule)
+        self._predicate=None
         break
     if not op_found:
       raise ValueError("row rule MUST have a valid operator for rule:" + row_rule)
+
+def _format_number(value):
+  """
+  Format an aggregated number as a cell, whole numbers without a trailing .0
+  """
+  if value.is_integer() and abs(value) < 1e15:
+    return str(int(value))
+  return repr(value)
+
+class TableGroupBy:
+  """
+  Groups the rows of a Table on one or more key columns, to summarize them
+  with agg(). Created by Table.group_by().
+
+  Args:
+    table:          Table to group the rows of
+    key_cols:       Column id or list of column ids to group on (starting
+                    at 1, same as in TableFilter rules)
+    table_filter:   Optional TableFilter, only rows passing its row rules are
+                    aggregated. Its column rule isn't used.
+  """
+  agg_funcs=['count','sum','min','max','mean']
+  def __init__(self,table,key_cols,table_filter=None):
+    if isinstance(key_cols,int):
+      key_cols=[key_cols]
+    self.key_cols=[int(c) for c in key_cols]
+    if not self.key_cols or min(self.key_cols) < 1:
+      raise ValueError('group by needs column ids, starting at 1')
+    self.table=table
+    self.table_filter=table_filter
+  def _rows(self):
+    """
+    Rows to aggregate, only the ones passing the filter if there is one.
+    Indexes on the table are used to narrow these down when they can be.
+    """
+    table=self.table
+    if not self.table_filter or not self.table_filter.row_rules:
+      return iter(table.rows)
+    check_row=self.table_filter._row_predicate()
+    candidates=self.table_filter._index_candidates(table)
+    if candidates is not None:
+      rows=table.rows
+      return filter(check_row,(rows[i] for i in candidates))
+    return filter(check_row,table.rows)
+  def agg(self,aggs):
+    """
+    Aggregate the rows of each group in a single pass over the table. Column
+    ids below 1 raise a ValueError, and ones past the last column of the
+    table an IndexError.
+
+    Functions:
+      count:  Number of non empty cells
+      sum:    Sum of the cells that are numbers
+      min:    Smallest of the cells that are numbers
+      max:    Largest of the cells that are numbers
+      mean:   Average of the cells that are numbers
+
+    Args:
+      aggs:   Dictionary of column id to a function name (or list of function
+              names), e.g. {3: 'sum', 4: ['min','max']}
+
+    Returns:
+      Table with the key columns and a column per aggregate, with a row per
+      group (in the order groups were first seen)
+    """
+    plan=[]
+    for col,funcs in aggs.items():
+      if isinstance(funcs,str):
+        funcs=[funcs]
+      for func in funcs:
+        if func not in self.agg_funcs:
+          raise ValueError("Unknown aggregate function: %s, must be one of: %s" % (func,', '.join(self.agg_funcs)))
+        plan.append((int(col),func))
+    if plan and min(col for col,func in plan) < 1:
+      raise ValueError('Column ids start at 1')
+    table=self.table
+    table.merge_pending()
+    if max(self.key_cols+[col for col,func in plan]) > table.col_count:
+      raise IndexError('Column id out of range, the table has %d columns' % (table.col_count))
+    #One accumulator per column being aggregated: [count,number count,sum,min,max]
+    agg_cols=sorted(set(col-1 for col,func in plan))
+    key_idx=[c-1 for c in self.key_cols]
+    need=max(key_idx+agg_cols)+1
+    get_key=itemgetter(*key_idx)
+    get_aggs=itemgetter(*agg_cols) if agg_cols else None
+    groups=dict()
+    for cells in self._rows():
+      if len(cells) < need:
+        cells=list(cells)+['']*(need-len(cells))
+      key=get_key(cells)
+      accs=groups.get(key)
+      if accs is None:
+        accs=[[0,0,0.0,None,None] for c in agg_cols]
+        groups[key]=accs
+      if get_aggs is None:
+        continue
+      values=get_aggs(cells)
+      if len(agg_cols) == 1:
+        values=(values,)
+      for acc,c in zip(accs,values):
+        if c == '':
+          continue
+        acc[0]+=1
+        try:
+          v=float(c)
+        except (ValueError,TypeError):
+          continue
+        acc[1]+=1
+        acc[2]+=v
+        if acc[3] is None or v < acc[3]:
+          acc[3]=v
+        if acc[4] is None or v > acc[4]:
+          acc[4]=v
+    #Build the summary table
+    col_names=table.col_names
+    name=lambda col: col_names[col-1] if col <= len(col_names) and col_names[col-1] else str(col)
+    new_table=Table(renderer=table.renderer.copy(),storage=table._derived_storage())
+    new_table._sink=table._copy_sink()
+    new_table.set_col_names([name(c) for c in self.key_cols]+['%s(%s)' % (func,name(col)) for col,func in plan])
+    acc_pos=dict((c+1,i) for i,c in enumerate(agg_cols))
+    rows=[]
+    for key,accs in groups.items():
+      if len(key_idx) == 1:
+        key=(key,)
+      row=[str(k) for k in key]
+      for col,func in plan:
+        count,num_count,total,low,high=accs[acc_pos[col]]
+        if func == 'count':
+          row.append(str(count))
+        elif not num_count:
+          row.append('')
+        elif func == 'sum':
+          row.append(_format_number(total))
+        elif func == 'min':
+          row.append(_format_number(low))
+        elif func == 'max':
+          row.append(_format_number(high))
+        else:
+          row.append(_format_number(total/num_count))
+      rows.append(row)
+    new_table.add_rows(rows)
+    return new_table
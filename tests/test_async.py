@@ -0,0 +1,30 @@
+"""
+Tests for the asyncio add_rows_async and render_async
+"""
+import asyncio
+
+from util import dynamic_table, sample_rows, reference_table, rendered
+
+col_names=['Date','Num','Float','Word']
+
+class FakeWriter:
+  def __init__(self):
+    self.chunks=[]
+  def write(self,data):
+    self.chunks.append(data)
+  async def drain(self):
+    pass
+
+def test_async_render_and_add_rows():
+  rows=sample_rows()
+  async def row_source():
+    for row in rows:
+      yield row
+  async def run():
+    table=dynamic_table.Table(output='String')
+    table.set_col_names(col_names)
+    await table.add_rows_async(row_source(),batch_rows=16)
+    writer=FakeWriter()
+    await table.render_async(writer,chunk_rows=25)
+    return b''.join(writer.chunks).decode('utf-8')
+  assert asyncio.run(run()) == rendered(reference_table(rows,col_names=col_names))
@@ -0,0 +1,92 @@
+"""
+Tests for add_rows and extend, compared against add_row
+"""
+import pytest
+
+from util import dynamic_table, sample_rows, sample_colors, reference_table, rendered, row_lists
+
+col_names=['Date','Num','Float','Word']
+
+def test_add_rows_matches_add_row():
+  rows=sample_rows()
+  row_colors=sample_colors()
+  expected=reference_table(rows,row_colors,col_names=col_names)
+  for storage in ('rows','columnar'):
+    table=dynamic_table.Table(output='String',storage=storage)
+    table.set_col_names(col_names)
+    table.add_batch_rows=37
+    table.add_rows(rows,colors=row_colors)
+    assert row_lists(table) == row_lists(expected)
+    assert rendered(table) == rendered(expected)
+
+def test_add_rows_with_filter():
+  rows=sample_rows()
+  table_filter=dynamic_table.TableFilter('2-4;4/echo')
+  expected=reference_table(rows,table_filter=table_filter)
+  table=dynamic_table.Table(output='String',table_filter=table_filter)
+  table.add_rows(rows)
+  assert row_lists(table) == row_lists(expected)
+  assert rendered(table) == rendered(expected)
+
+def data_widths(rows):
+  """
+  Returns the width of each column over just the rows
+  """
+  col_count=max(map(len,rows))
+  return [max(len(str(r[i])) for r in rows if i < len(r)) for i in range(col_count)]
+
+def other_table(kind,rows,row_colors,tmp_path):
+  """
+  Returns a table holding rows, made the way kind says, with column names
+  wider than any of the cells
+  """
+  long_names=['A very long column name']*4
+  if kind == 'mapped':
+    path=tmp_path / 'other.tsv'
+    path.write_text('\t'.join(long_names)+'\n'+''.join('\t'.join(r)+'\n' for r in rows))
+    return dynamic_table.Table.map_file(str(path),sep='\t',output='String')
+  other=dynamic_table.Table(output='String',storage='columnar' if kind in ('columnar','loaded','numpy') else 'rows',max_rows=len(rows) if kind == 'ring' else None)
+  other.set_col_names(long_names)
+  if kind == 'ring':
+    #The widest rows get pushed out again
+    other.add_rows([['x'*30]*5]*5)
+  for row,row_color in zip(rows,row_colors):
+    other.add_row(row,row_color)
+  if kind == 'loaded':
+    other.save(str(tmp_path / 'other.dyt'))
+    return dynamic_table.Table.load(str(tmp_path / 'other.dyt'),output='String')
+  if kind == 'numpy':
+    pytest.importorskip('numpy')
+    return dynamic_table.TableFilter('1-;2>=0',use_numpy=True).filter_table(other)
+  return other
+
+@pytest.mark.parametrize('kind',['rows','columnar','ring','mapped','loaded','numpy'])
+@pytest.mark.parametrize('storage',['rows','columnar'])
+def test_extend_matches_add_row(storage,kind,tmp_path):
+  rows=sample_rows()
+  row_colors=sample_colors()
+  if kind in ('mapped','numpy'):
+    #Mapped files have no colors, and short rows are filtered out by number rules
+    rows=[r+['']*(5-len(r)) for r in rows]
+    row_colors=[[]]*len(rows)
+  other=other_table(kind,rows[100:],row_colors[100:],tmp_path)
+  assert other.col_widths_data == data_widths(rows[100:])
+  table=dynamic_table.Table(output='String',storage=storage)
+  table.set_col_names(col_names)
+  for row,row_color in zip(rows[:100],row_colors[:100]):
+    table.add_row(row,row_color)
+  table.extend(other)
+  expected=reference_table(rows,row_colors,col_names=col_names)
+  assert table.col_widths_real == expected.col_widths_real
+  assert table.col_widths_data == expected.col_widths_data == data_widths(rows)
+  assert row_lists(table) == row_lists(expected)
+  assert rendered(table) == rendered(expected)
+
+def test_extend_copies_rows():
+  other=reference_table([['a','b'],['c','d']],[['red'],[]])
+  table=dynamic_table.Table(output='String')
+  table.extend(other)
+  table.rows[0][0]='changed'
+  table.row_colorization[0][0]='blue'
+  assert other.rows[0] == ['a','b']
+  assert other.row_colorization[0] == ['red']
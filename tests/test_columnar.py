@@ -0,0 +1,35 @@
+"""
+Tests for storage='columnar', compared against the list storage
+"""
+import pytest
+
+from util import dynamic_table, sample_rows, sample_colors, reference_table, rendered, row_lists, renderers
+
+col_names=['Date','Num','Float','Word']
+
+def columnar_table(rows,row_colors=None,renderer=None):
+  table=dynamic_table.Table(renderer or dynamic_table.RenderText(),output='String',storage='columnar')
+  table.set_col_names(col_names)
+  for i,row in enumerate(rows):
+    table.add_row(row,row_colors[i] if row_colors else [])
+  return table
+
+@pytest.mark.parametrize('renderer',renderers(),ids=lambda r: type(r).__name__)
+def test_columnar_matches_rows(renderer):
+  rows=sample_rows()
+  row_colors=sample_colors()
+  expected=reference_table(rows,row_colors,renderer,col_names)
+  table=columnar_table(rows,row_colors,renderer.copy())
+  assert row_lists(table) == row_lists(expected)
+  assert rendered(table) == rendered(expected)
+
+def test_columnar_filter_and_copy():
+  rows=sample_rows()
+  expected=reference_table(rows,col_names=col_names)
+  table=columnar_table(rows)
+  table_filter=dynamic_table.TableFilter('1,2,4;2>500')
+  assert row_lists(table_filter.filter_table(table)) == row_lists(table_filter.filter_table(expected))
+  copied=table.copy()
+  copied.add_row(['x','1'])
+  assert len(copied.rows) == len(rows)+1
+  assert len(table.rows) == len(rows)
@@ -0,0 +1,69 @@
+"""
+Tests for concurrent=True tables, with rows added from several threads
+"""
+import threading
+
+from util import dynamic_table, sample_rows, reference_table, rendered, row_lists
+
+def test_concurrent_readers_see_buffered_rows():
+  rows=[r for r in sample_rows() if len(r) == 4]
+  table=dynamic_table.Table(output='String',concurrent=True)
+  for row in rows:
+    table.add_row(row)
+  #Fewer rows than ingest_batch_rows, so they are all still buffered
+  assert len(table) == len(rows)
+  table_filter=dynamic_table.TableFilter('1-;2>500')
+  expected=table_filter.filter_table(reference_table(rows))
+  assert row_lists(table_filter.filter_table(table)) == row_lists(expected)
+
+def test_concurrent_threads_match_add_row():
+  rows=sample_rows(4000)
+  table=dynamic_table.Table(output='String',concurrent=True)
+  table.ingest_batch_rows=50
+  def add(part):
+    for row in part:
+      table.add_row(row)
+  parts=[rows[i::4] for i in range(4)]
+  threads=[threading.Thread(target=add,args=(part,)) for part in parts]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert len(table) == len(rows)
+  #Finished threads' buffers are dropped by the merge
+  assert table._ingest_buffers == []
+  got=row_lists(table)
+  assert sorted(got) == sorted(row_lists(reference_table(rows)))
+  #Each thread's rows keep their order
+  for part in parts:
+    part_rows=row_lists(reference_table(part))
+    assert [r for r in got if r in part_rows] == part_rows
+  assert rendered(table) == rendered(reference_table(got))
+
+def test_rows_added_while_merging_are_kept():
+  table=dynamic_table.Table(output='String',concurrent=True)
+  added=threading.Event()
+  go_on=threading.Event()
+  def add():
+    table.add_row(['first'])
+    added.set()
+    go_on.wait()
+    table.add_row(['last'])
+  thread=threading.Thread(target=add)
+  thread.start()
+  added.wait()
+  take_buffer=table._take_buffer
+  def take_then_finish(buf):
+    take_buffer(buf)
+    #The thread adds its last row right after its buffer was emptied, and
+    # is gone by the time the merge looks at it
+    if thread.is_alive():
+      go_on.set()
+      thread.join()
+  table._take_buffer=take_then_finish
+  table.merge_pending()
+  del table._take_buffer
+  assert [list(r) for r in table.rows] == [['first']]
+  assert len(table) == 2
+  assert [list(r) for r in table.rows] == [['first'],['last']]
+  assert table._ingest_buffers == []
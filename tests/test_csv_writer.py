@@ -0,0 +1,23 @@
+"""
+Tests for RenderCSV with csv_writer, compared against the csv module
+"""
+import csv
+import io
+
+from util import dynamic_table, reference_table, rendered
+
+col_names=['Date','Num','Float','Word']
+
+def test_csv_writer_quotes_like_csv_module():
+  rows=[['a,b','say "hi"','plain'],['multi\nline','',' x ']]
+  table=reference_table(rows,renderer=dynamic_table.RenderCSV(csv_writer=True,sep_char=','),col_names=['c1','c2','c3'])
+  expected=io.StringIO()
+  writer=csv.writer(expected,lineterminator='\n')
+  writer.writerow(['c1','c2','c3'])
+  writer.writerows(rows)
+  assert rendered(table) == expected.getvalue()
+  output=io.StringIO()
+  table=reference_table(rows,renderer=dynamic_table.RenderCSV(csv_writer=True,sep_char=','),col_names=['c1','c2','c3'])
+  table._sink=dynamic_table.FileSink(output)
+  table.render()
+  assert output.getvalue() == expected.getvalue()
@@ -0,0 +1,40 @@
+"""
+Tests for date coercion in TableFilter date rules
+"""
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from util import dynamic_table, reference_table
+
+def test_date_formats():
+  table=reference_table([['20140801 4:00:00'],['2014-07-30 12:00:00'],['2014-07-30T11:00:00'],['2013-04-21 1:00:00'],['not a date']])
+  filtered=dynamic_table.TableFilter('1;1>2014-07-30 11:30:00').filter_table(table)
+  assert [r[0] for r in filtered.rows] == ['20140801 4:00:00','2014-07-30 12:00:00']
+
+@pytest.fixture
+def new_york(monkeypatch):
+  if not hasattr(time,'tzset'):
+    pytest.skip('needs time.tzset')
+  monkeypatch.setenv('TZ','America/New_York')
+  time.tzset()
+  date_epoch=dynamic_table._get_date_epoch()
+  date_epoch.cache_clear()
+  yield date_epoch
+  monkeypatch.undo()
+  time.tzset()
+  date_epoch.cache_clear()
+
+def test_naive_dates_are_local_time(new_york):
+  local=datetime(2014,7,30,12).timestamp()
+  assert new_york('2014-07-30 12:00:00') == local
+  assert new_york('20140730 12:00:00') == local
+  #Handed to dateutil
+  assert new_york('Jul 30 2014 12:00') == local
+  assert new_york('2014-07-30T12:00:00Z') == datetime(2014,7,30,12,tzinfo=timezone.utc).timestamp()
+  assert new_york('2014-07-30T12:00:00-04:00') == local
+  #12:00 UTC is 8:00 in New York, so before 10:00 local time
+  table=reference_table([['2014-07-30T12:00:00Z'],['2014-07-30T15:00:00Z']])
+  filtered=dynamic_table.TableFilter('1;1>2014-07-30 10:00:00').filter_table(table)
+  assert [r[0] for r in filtered.rows] == ['2014-07-30T15:00:00Z']
@@ -0,0 +1,44 @@
+"""
+Tests for the compiled TableFilter row and column rules
+"""
+from datetime import datetime
+
+import pytest
+
+from util import dynamic_table, sample_rows, reference_table, row_lists
+
+def cell(row,col):
+  return row[col-1] if col <= len(row) else ''
+
+def as_date(value):
+  return datetime.strptime(value,'%Y-%m-%d %H:%M:%S')
+
+#Filter text and the plain python check each one should match
+rules=[
+  ('1-;2>500',lambda r: cell(r,2) != '' and float(cell(r,2)) > 500),
+  ('1-;2<=100;3>10',lambda r: cell(r,2) != '' and float(cell(r,2)) <= 100 and cell(r,3) != '' and float(cell(r,3)) > 10),
+  ('1-;4/echo',lambda r: 'echo' in cell(r,4)),
+  ('1-;4!/echo',lambda r: 'echo' not in cell(r,4)),
+  ('1-;4=golf',lambda r: cell(r,4) == 'golf'),
+  ('1-;4!=golf',lambda r: cell(r,4) != 'golf'),
+  ('1-;1<2014-07-10 00:00:00',lambda r: as_date(cell(r,1)) < datetime(2014,7,10)),
+  ('1-;1>=2014-07-20 12:00:00;2<900',lambda r: as_date(cell(r,1)) >= datetime(2014,7,20,12) and cell(r,2) != '' and float(cell(r,2)) < 900),
+]
+
+@pytest.mark.parametrize('filter_txt,check',rules,ids=[r[0] for r in rules])
+def test_row_rules_match_python(filter_txt,check):
+  rows=sample_rows()
+  table=reference_table(rows)
+  expected=[r for r in row_lists(table) if check(r)]
+  assert expected
+  filtered=dynamic_table.TableFilter(filter_txt).filter_table(table)
+  assert row_lists(filtered) == expected
+  #Filtering while adding rows keeps the same rows. Rows are checked before
+  # they get padded there, so pad them up front
+  padded=[r+['']*(table.col_count-len(r)) for r in rows]
+  assert row_lists(reference_table(padded,table_filter=dynamic_table.TableFilter(filter_txt))) == expected
+
+def test_column_rule():
+  table=reference_table(sample_rows())
+  filtered=dynamic_table.TableFilter('1,3-;2>900').filter_table(table)
+  assert row_lists(filtered) == [[r[0]]+r[2:] for r in row_lists(table) if float(r[1] or 0) > 900]
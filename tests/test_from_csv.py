@@ -0,0 +1,44 @@
+"""
+Tests for Table.from_csv, compared against add_row
+"""
+import csv
+import io
+
+import pytest
+
+from util import dynamic_table, sample_rows, reference_table, rendered, row_lists
+
+col_names=['Date','Num','Float','Word']
+
+def write_csv(path,rows,sep=','):
+  with open(path,'w',newline='') as f:
+    writer=csv.writer(f,delimiter=sep)
+    writer.writerow(col_names)
+    writer.writerows(rows)
+
+@pytest.mark.parametrize('storage',['rows','columnar'])
+def test_from_csv_matches_add_row(tmp_path,storage):
+  rows=sample_rows()
+  rows[3][3]='quoted, "value"'
+  path=tmp_path / 'data.csv'
+  write_csv(path,rows)
+  expected=reference_table(rows,col_names=col_names)
+  table=dynamic_table.Table.from_csv(str(path),output='String',storage=storage)
+  assert row_lists(table) == row_lists(expected)
+  assert rendered(table) == rendered(expected)
+
+def test_from_csv_with_filter(tmp_path):
+  rows=[r+['']*(5-len(r)) for r in sample_rows()]
+  path=tmp_path / 'data.tsv'
+  write_csv(path,rows,sep='\t')
+  table_filter=dynamic_table.TableFilter('1,4;2>500')
+  expected=reference_table(rows,col_names=col_names,table_filter=table_filter)
+  table=dynamic_table.Table.from_csv(str(path),sep='\t',table_filter=table_filter,output='String')
+  assert row_lists(table) == row_lists(expected)
+  assert rendered(table) == rendered(expected)
+
+def test_from_csv_file_object():
+  csv_file=io.StringIO('a,b\n1,2\n3\n')
+  table=dynamic_table.Table.from_csv(csv_file,output='String')
+  assert table.col_names == ['a','b']
+  assert row_lists(table) == [['1','2'],['3','']]
@@ -0,0 +1,35 @@
+"""
+Tests for Table.group_by and agg
+"""
+import pytest
+
+from util import dynamic_table, sample_rows, reference_table, row_lists
+
+col_names=['Date','Num','Float','Word']
+
+def test_group_by_matches_python():
+  rows=[r+['']*(5-len(r)) for r in sample_rows()]
+  table=reference_table(rows,col_names=col_names)
+  summary=table.group_by(4).agg({2: ['count','sum','max'],3: 'mean'})
+  groups=dict()
+  for r in rows:
+    groups.setdefault(r[3],[]).append(r)
+  expected=[]
+  for word,group in groups.items():
+    nums=[float(r[1]) for r in group if r[1] != '']
+    floats=[float(r[2]) for r in group if r[2] != '']
+    expected.append([word,str(len(nums)),dynamic_table._format_number(sum(nums)),dynamic_table._format_number(max(nums)) if nums else '',dynamic_table._format_number(sum(floats)/len(floats)) if floats else ''])
+  assert row_lists(summary) == expected
+  assert summary.col_names == ['Word','count(Num)','sum(Num)','max(Num)','mean(Float)']
+
+@pytest.mark.parametrize('key_cols,aggs,error',[
+  (0,{2: 'sum'},ValueError),
+  (1,{0: 'sum'},ValueError),
+  (6,{2: 'sum'},IndexError),
+  (1,{6: 'sum'},IndexError),
+  ([1,9],{},IndexError),
+])
+def test_group_by_checks_column_ids(key_cols,aggs,error):
+  table=reference_table(sample_rows())
+  with pytest.raises(error):
+    table.group_by(key_cols).agg(aggs)
@@ -0,0 +1,49 @@
+"""
+Tests that importing dynamic_table stays fast and doesn't pull in dateutil
+or the date parsing modules until a date actually needs parsing
+"""
+import os
+import subprocess
+import sys
+
+repo_dir=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+#Cumulative import time budget in microseconds. Importing the module takes
+# a few ms, dateutil.parser alone takes well over this
+import_budget_us=20000
+
+def run_python(code,*flags):
+  return subprocess.run([sys.executable]+list(flags)+['-c',code],cwd=repo_dir,capture_output=True,text=True,check=True)
+
+def import_time_us():
+  """
+  Returns the cumulative import time of dynamic_table from -X importtime
+  """
+  #Compile the module up front, with PYTHONDONTWRITEBYTECODE set every run
+  # would otherwise be timing the compile rather than the import
+  run_python('import py_compile; py_compile.compile("dynamic_table.py")')
+  result=run_python('import dynamic_table','-X','importtime')
+  for line in result.stderr.splitlines():
+    fields=[f.strip() for f in line.split('|')]
+    if len(fields) == 3 and fields[2] == 'dynamic_table':
+      return int(fields[1])
+  raise AssertionError('dynamic_table not in -X importtime output:\n'+result.stderr)
+
+def test_import_time_budget():
+  #Best of a few runs
+  best=min(import_time_us() for i in range(3))
+  assert best < import_budget_us, 'importing dynamic_table took %dus, budget is %dus' % (best,import_budget_us)
+
+def test_import_skips_date_modules():
+  result=run_python('import sys, dynamic_table\nprint(" ".join(m for m in ("dateutil","dateutil.parser","re","datetime") if m in sys.modules))')
+  assert result.stdout.strip() == ''
+
+def test_date_rule_loads_parser_when_needed():
+  code='\n'.join([
+    'import sys, dynamic_table',
+    't=dynamic_table.Table(output="String")',
+    't.add_row(["2014-07-30 12:00:00"])',
+    't.add_row(["20140801 4:00:00"])',
+    'f=dynamic_table.TableFilter("1;1>2014-07-30 00:00:00")',
+    'print(len(f.filter_table(t).rows))',
+  ])
+  assert run_python(code).stdout.strip() == '2'
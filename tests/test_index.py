@@ -0,0 +1,21 @@
+"""
+Tests for column indexes, compared against scanning every row
+"""
+import pytest
+
+from util import dynamic_table, sample_rows, reference_table, row_lists
+
+@pytest.mark.parametrize('kind',['hash','sorted'])
+def test_index_matches_scan(kind):
+  rows=sample_rows()
+  table=reference_table(rows[:50])
+  table.create_index(2,kind)
+  table.create_index(1,'sorted')
+  #Build the typed indexes, then keep adding rows out of order and in order
+  dynamic_table.TableFilter('1-;2=5;1>2014-07-01 00:00:00').filter_table(table)
+  for row in rows[50:]+sorted(rows,key=lambda r: int(r[1])):
+    table.add_row(row)
+  plain=reference_table(rows[:50]+rows[50:]+sorted(rows,key=lambda r: int(r[1])))
+  for filter_txt in ('1-;2=595','1-;2!=595','1-;2>500','1-;2<=100;1>=2014-07-20 00:00:00','1-;1<2014-07-10 00:00:00','1-;2>=919'):
+    table_filter=dynamic_table.TableFilter(filter_txt)
+    assert row_lists(table_filter.filter_table(table)) == row_lists(table_filter.filter_table(plain)),filter_txt
@@ -0,0 +1,24 @@
+"""
+Tests for the RenderText row layout plan
+"""
+import pytest
+
+from util import dynamic_table, sample_rows, sample_colors, reference_table
+
+col_names=['Date','Num','Float','Word']
+
+def full_table(renderer=None,count=200):
+  return reference_table(sample_rows(count),sample_colors(count),renderer,col_names)
+
+@pytest.mark.parametrize('opts',[dict(),dict(padding=3,indent=2),dict(borderless=True,padding_char='.'),dict(color_disabled=True)],ids=str)
+def test_text_layout_plan_matches_print_row(opts):
+  renderer=dynamic_table.RenderText(**opts)
+  table=full_table(renderer)
+  indent_str=renderer._indent_lvl(opts['indent']) if opts.get('indent') else ''
+  expected=[]
+  for r,c in zip(table.rows,table.row_colorization):
+    r=list(r)+['']*(table.col_count-len(r))
+    if opts.get('color_disabled'):
+      c=None
+    expected.append(renderer.print_row(table,r,c,adhoc=False,indent_str=indent_str))
+  assert ''.join(renderer.iter_rows(table,indent_str=indent_str)) == ''.join(expected)
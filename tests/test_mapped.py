@@ -0,0 +1,45 @@
+"""
+Tests for Table.map_file, compared against list storage
+"""
+import pytest
+
+from util import dynamic_table, sample_rows, reference_table, rendered, row_lists
+
+col_names=['Date','Num','Float','Word']
+
+def test_map_file_matches_rows(tmp_path):
+  rows=[r for r in sample_rows() if len(r) == 4]
+  path=tmp_path / 'data.tsv'
+  path.write_text('\t'.join(col_names)+'\n'+''.join('\t'.join(r)+'\n' for r in rows))
+  expected=reference_table(rows,col_names=col_names)
+  table=dynamic_table.Table.map_file(str(path),sep='\t',output='String')
+  assert row_lists(table) == row_lists(expected)
+  assert rendered(table) == rendered(expected)
+  assert rendered(table,offset=10,limit=5) == rendered(expected,offset=10,limit=5)
+  with pytest.raises(TypeError):
+    table.add_row(['a'])
+
+def test_writes_leave_mapped_table_alone(tmp_path):
+  rows=[r for r in sample_rows() if len(r) == 4]
+  path=tmp_path / 'data.tsv'
+  path.write_text('\t'.join(col_names)+'\n'+''.join('\t'.join(r)+'\n' for r in rows))
+  table=dynamic_table.Table.map_file(str(path),sep='\t',output='String')
+  expected=rendered(table)
+  col_count=table.col_count
+  for write in (lambda: table.add_row(['a']*9),lambda: table.add_rows([['a']*9]),lambda: table.extend(reference_table([['a']*9]))):
+    with pytest.raises(TypeError):
+      write()
+    assert table.col_count == col_count
+    assert rendered(table) == expected
+
+def test_close_mapped_table(tmp_path):
+  path=tmp_path / 'data.tsv'
+  path.write_text('a\tb\n1\t2\n3\t4\n')
+  with dynamic_table.Table.map_file(str(path),sep='\t',output='String') as table:
+    store=table._store
+    assert row_lists(table) == [['1','2'],['3','4']]
+  assert store.data.__class__ is bytes
+  assert len(table.rows) == 0
+  #Closing twice or closing other tables is fine
+  table.close()
+  dynamic_table.Table(output='String').close()
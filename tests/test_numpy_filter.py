@@ -0,0 +1,30 @@
+"""
+Tests for the NumPy TableFilter backend, compared against the python one
+"""
+import pytest
+
+from util import dynamic_table, sample_rows, sample_colors, reference_table, rendered, row_lists
+
+def columnar_table(rows,row_colors=None):
+  table=dynamic_table.Table(output='String',storage='columnar')
+  for i,row in enumerate(rows):
+    table.add_row(row,row_colors[i] if row_colors else [])
+  return table
+
+numpy_filters=['1-;2>500','1-;2<=100;3>10','1-;4/echo','1-;4!/echo','1-;4=golf','1-;4!=golf','1-;1<2014-07-10 00:00:00','1-;1>=2014-07-20 12:00:00;2<900',
+  '2,4;4/echo','1,3-;2<300','1-;2/9','1>=0;2!/5','1-;1/2014','3;4/é']
+
+@pytest.mark.parametrize('filter_txt',numpy_filters)
+def test_numpy_matches_python(filter_txt):
+  pytest.importorskip('numpy')
+  rows=[r+['']*(5-len(r)) for r in sample_rows(1000)]+[['2014-07-01 00:00:00','5','1.0','é'*7,'']]
+  row_colors=sample_colors(1001)
+  expected=dynamic_table.TableFilter(filter_txt,use_numpy=False).filter_table(reference_table(rows,row_colors))
+  for use_numpy in (True,None):
+    table_filter=dynamic_table.TableFilter(filter_txt,use_numpy=use_numpy)
+    #Small enough table that the automatic pick needs a lower threshold
+    table_filter.numpy_min_rows=100
+    filtered=table_filter.filter_table(columnar_table(rows,row_colors))
+    assert row_lists(filtered) == row_lists(expected)
+    assert [list(c) for c in filtered.row_colorization] == [list(c) for c in expected.row_colorization]
+    assert rendered(filtered) == rendered(expected)
@@ -0,0 +1,25 @@
+"""
+Tests for paginated and windowed rendering
+"""
+import pytest
+
+from util import sample_rows, sample_colors, reference_table, rendered
+
+col_names=['Date','Num','Float','Word']
+
+def full_table(renderer=None,count=200):
+  return reference_table(sample_rows(count),sample_colors(count),renderer,col_names)
+
+@pytest.mark.parametrize('widths',['global','page'])
+def test_page_matches_rows_on_page(widths):
+  table=full_table()
+  rows=sample_rows()
+  page=table.page(3,20,widths=widths)
+  if widths == 'page':
+    expected=reference_table(rows[40:60],sample_colors()[40:60],col_names=col_names)
+    assert page == rendered(expected)
+  else:
+    lines=rendered(table).splitlines()
+    assert page.splitlines()[3:-1] == lines[3+40:3+60]
+  with pytest.raises(ValueError):
+    table.page(0,20)
@@ -0,0 +1,19 @@
+"""
+Tests for parallel row rendering, compared against a serial render
+"""
+import pytest
+
+from util import dynamic_table, sample_rows, sample_colors, reference_table, rendered
+
+col_names=['Date','Num','Float','Word']
+
+def full_table(renderer=None,count=200):
+  return reference_table(sample_rows(count),sample_colors(count),renderer,col_names)
+
+@pytest.mark.parametrize('pool',['thread','process'])
+@pytest.mark.parametrize('make',[dynamic_table.RenderText,dynamic_table.RenderCSV,dynamic_table.RenderHTML],ids=lambda m: m.__name__)
+def test_parallel_matches_serial(make,pool):
+  renderer=make(parallel=2,parallel_pool=pool)
+  renderer.parallel_min_rows=100
+  table=full_table(renderer,count=3000)
+  assert rendered(table) == rendered(full_table(make(),count=3000))
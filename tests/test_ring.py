@@ -0,0 +1,31 @@
+"""
+Tests for bounded (max_rows/max_age) tables
+"""
+import pytest
+
+from util import dynamic_table, sample_rows, reference_table, rendered, row_lists
+
+col_names=['Date','Num','Float','Word']
+
+def test_ring_keeps_last_rows():
+  rows=[r for r in sample_rows() if len(r) == 4]
+  expected=reference_table(rows[-25:],col_names=col_names)
+  table=dynamic_table.Table(output='String',max_rows=25)
+  table.set_col_names(col_names)
+  for row in rows:
+    table.add_row(row)
+  assert row_lists(table) == row_lists(expected)
+  #Widths shrink back as wide rows are evicted
+  assert rendered(table) == rendered(expected)
+
+def test_ring_max_age():
+  table=dynamic_table.Table(output='String',max_age=(2,10))
+  for i in range(30):
+    table.add_row(['row%d' % (i),str(i)])
+  assert [r[1] for r in table.rows] == [str(i) for i in range(19,30)]
+
+def test_ring_rejects_sort():
+  table=dynamic_table.Table(output='String',max_rows=5)
+  table.add_row(['a'])
+  with pytest.raises(ValueError):
+    table.sort_by(1)
@@ -0,0 +1,21 @@
+"""
+Tests for the incremental row render cache
+"""
+import pytest
+
+from util import dynamic_table, sample_rows, reference_table, rendered
+
+col_names=['Date','Num','Float','Word']
+
+@pytest.mark.parametrize('make',[dynamic_table.RenderText,dynamic_table.RenderCSV,dynamic_table.RenderHTML],ids=lambda m: m.__name__)
+def test_row_cache_matches_fresh_render(make):
+  rows=sample_rows()
+  table=reference_table(rows[:100],renderer=make(row_cache=True),col_names=col_names)
+  rendered(table)
+  for row in rows[100:]:
+    table.add_row(row)
+  expected=reference_table(rows,renderer=make(),col_names=col_names)
+  assert rendered(table) == rendered(expected)
+  table.set_col_widths([3,4])
+  expected.set_col_widths([3,4])
+  assert rendered(table) == rendered(expected)
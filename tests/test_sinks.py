@@ -0,0 +1,42 @@
+"""
+Tests for the output sinks
+"""
+import io
+
+import pytest
+
+from util import dynamic_table, sample_rows, sample_colors, reference_table, rendered
+
+col_names=['Date','Num','Float','Word']
+
+def full_table(renderer=None,count=200):
+  return reference_table(sample_rows(count),sample_colors(count),renderer,col_names)
+
+def test_sinks_match_built_buffer():
+  expected=rendered(full_table())
+  text=io.StringIO()
+  binary=io.BytesIO()
+  for output in (dynamic_table.FileSink(text,flush_size=100),dynamic_table.BytesSink(binary,flush_size=0),dynamic_table.StringSink()):
+    table=reference_table(sample_rows(),sample_colors(),col_names=col_names)
+    table._sink=output
+    table.render(chunk_rows=10)
+    table.flush_output()
+  assert text.getvalue() == expected
+  assert binary.getvalue().decode('utf-8') == expected
+  assert output.getvalue() == expected
+
+def test_custom_sink():
+  with pytest.raises(TypeError):
+    dynamic_table.OutputSink()
+  class ListSink(dynamic_table.OutputSink):
+    def __init__(self):
+      dynamic_table.OutputSink.__init__(self,flush_size=50)
+      self.writes=[]
+    def _write_out(self,chunks):
+      self.writes.append(''.join(chunks))
+  output=ListSink()
+  table=reference_table(sample_rows(),sample_colors(),col_names=col_names)
+  table._sink=output
+  table.render(chunk_rows=10)
+  assert len(output.writes) > 1
+  assert ''.join(output.writes) == rendered(full_table())
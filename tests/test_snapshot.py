@@ -0,0 +1,38 @@
+"""
+Tests for Table.save and Table.load
+"""
+import pytest
+
+from util import dynamic_table, sample_rows, sample_colors, reference_table, rendered, row_lists
+
+col_names=['Date','Num','Float','Word']
+
+@pytest.mark.parametrize('storage',['rows','columnar'])
+def test_save_load_round_trip(tmp_path,storage):
+  rows=sample_rows()
+  row_colors=sample_colors()
+  expected=reference_table(rows,row_colors,col_names=col_names)
+  table=dynamic_table.Table(output='String',storage=storage)
+  table.set_col_names(col_names)
+  for row,row_color in zip(rows,row_colors):
+    table.add_row(row,row_color)
+  path=str(tmp_path / 'table.dyt')
+  table.save(path)
+  loaded=dynamic_table.Table.load(path,output='String')
+  assert row_lists(loaded) == row_lists(expected)
+  assert rendered(loaded) == rendered(expected)
+
+def test_save_over_loaded_file(tmp_path):
+  rows=sample_rows()
+  path=str(tmp_path / 'table.dyt')
+  reference_table(rows[:100],col_names=col_names).save(path)
+  loaded=dynamic_table.Table.load(path,output='String')
+  loaded.save(path)
+  #The rows mapped from the replaced file can still be read
+  assert row_lists(loaded) == row_lists(reference_table(rows[:100],col_names=col_names))
+  for row in rows[100:]:
+    loaded.add_row(row)
+  loaded.save(path)
+  expected=reference_table(rows,col_names=col_names)
+  assert rendered(dynamic_table.Table.load(path,output='String')) == rendered(expected)
+  assert [p.name for p in tmp_path.iterdir()] == ['table.dyt']
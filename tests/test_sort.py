@@ -0,0 +1,41 @@
+"""
+Tests for Table.sort_by, compared against sorted()
+"""
+import pytest
+
+from util import dynamic_table, sample_rows, sample_colors, reference_table, rendered, row_lists
+
+col_names=['Date','Num','Float','Word']
+
+def number_key(row):
+  return (row[1] == '',float(row[1] or 0))
+
+@pytest.mark.parametrize('storage',['rows','columnar'])
+@pytest.mark.parametrize('budget_rows',[None,17])
+def test_sort_matches_sorted(storage,budget_rows):
+  rows=[r+['']*(5-len(r)) for r in sample_rows()]
+  row_colors=sample_colors()
+  order=sorted(range(len(rows)),key=lambda i: number_key(rows[i]))
+  expected=reference_table([rows[i] for i in order],[row_colors[i] for i in order],col_names=col_names)
+  table=dynamic_table.Table(output='String',storage=storage)
+  table.set_col_names(col_names)
+  for row,row_color in zip(rows,row_colors):
+    table.add_row(row,row_color)
+  table.sort_by(2,budget_rows=budget_rows)
+  assert row_lists(table) == row_lists(expected)
+  assert rendered(table) == rendered(expected)
+
+def test_sort_multiple_columns_reversed():
+  rows=sample_rows()
+  table=reference_table(rows)
+  table.sort_by([4,1],reverse=True)
+  padded=row_lists(reference_table(rows))
+  expected=sorted(padded,key=lambda r: (r[3],r[0]),reverse=True)
+  #Empty cells sort before the rest when reversed
+  expected=[r for r in expected if r[3] == '']+[r for r in expected if r[3] != '']
+  assert row_lists(table) == expected
+
+def test_sort_dates_by_time():
+  table=reference_table([['2014-07-30 9:00:00'],['2014-07-30 10:00:00'],['2014-07-29 23:00:00']])
+  table.sort_by(1)
+  assert [r[0] for r in table.rows] == ['2014-07-29 23:00:00','2014-07-30 9:00:00','2014-07-30 10:00:00']
@@ -0,0 +1,40 @@
+"""
+Tests for enable_stats and the per phase timings
+"""
+import io
+import threading
+
+import pytest
+
+from util import dynamic_table, sample_rows, reference_table, rendered
+
+col_names=['Date','Num','Float','Word']
+
+@pytest.mark.parametrize('csv_writer',[False,True])
+def test_stats_time_output_of_file_render(csv_writer):
+  output=io.StringIO()
+  table=reference_table(sample_rows(),renderer=dynamic_table.RenderCSV(csv_writer=csv_writer),col_names=col_names)
+  table._sink=dynamic_table.FileSink(output)
+  table.enable_stats()
+  table.render()
+  stats=table.stats()
+  assert stats['_output']['calls'] > 0
+  assert stats['print_header']['calls'] == 1
+  assert stats['print_rows']['calls'] > 0
+  assert output.getvalue() == rendered(reference_table(sample_rows(),renderer=dynamic_table.RenderCSV(csv_writer=csv_writer),col_names=col_names))
+
+def test_stats_count_every_thread():
+  rows=sample_rows(2000)
+  table=dynamic_table.Table(output='String',concurrent=True)
+  table.ingest_batch_rows=50
+  table.enable_stats()
+  def add(part):
+    for row in part:
+      table.add_row(row)
+  threads=[threading.Thread(target=add,args=(rows[i::8],)) for i in range(8)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert len(table) == len(rows)
+  assert table.stats()['add_row']['calls'] == len(rows)
@@ -0,0 +1,19 @@
+"""
+Tests for rendering a table in chunks
+"""
+import pytest
+
+from util import sample_rows, sample_colors, reference_table, renderers
+
+col_names=['Date','Num','Float','Word']
+
+def full_table(renderer=None,count=200):
+  return reference_table(sample_rows(count),sample_colors(count),renderer,col_names)
+
+@pytest.mark.parametrize('renderer',renderers(),ids=lambda r: type(r).__name__)
+def test_chunked_render_matches_print_table(renderer):
+  table=full_table(renderer)
+  expected=renderer.print_table(table)
+  assert ''.join(table.iter_render(chunk_rows=7)) == expected
+  table.render(chunk_rows=7)
+  assert table.built_buffer == expected
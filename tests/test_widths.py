@@ -0,0 +1,17 @@
+"""
+Tests for the incrementally kept column widths
+"""
+from util import sample_rows, reference_table
+
+col_names=['Date','Num','Float','Word']
+
+def test_col_widths_follow_rows():
+  rows=sample_rows()
+  table=reference_table(rows,col_names=col_names)
+  col_count=max(len(r) for r in rows)
+  for i in range(col_count):
+    widths=[len(r[i]) for r in rows if i < len(r)]
+    if i < len(col_names):
+      widths.append(len(col_names[i]))
+    assert table.col_widths_real[i] == max(widths)
+  assert table.col_count == col_count
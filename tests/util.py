@@ -0,0 +1,57 @@
+"""
+Shared helpers for the dynamic_table tests. Most tests build the same rows
+through a feature and through the plain list storage add_row path, and
+compare rendered output or row content.
+"""
+import os
+import sys
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dynamic_table
+
+words=['alpha','bravo','charlie','delta','echo','foxtrot','golf','hotel']
+colors=['red','green','bold','bg_blue,white','']
+
+def sample_rows(count=200):
+  """
+  Rows of a date, an integer, a float and a word. Every 9th row is short and
+  every 13th one has an extra column, so padding gets exercised.
+  """
+  rows=[]
+  for i in range(count):
+    row=['2014-07-%02d %02d:00:00' % (1+i % 28,i % 24),str((i*7919) % 1000),'%.1f' % ((i*31) % 97/3.0),words[i % len(words)]*(1+i % 3)]
+    if i % 9 == 4:
+      row=row[:2]
+    elif i % 13 == 6:
+      row.append('extra')
+    rows.append(row)
+  return rows
+
+def sample_colors(count=200):
+  return [[colors[(i+c) % len(colors)] for c in range(2)] if i % 4 == 0 else [] for i in range(count)]
+
+def reference_table(rows,row_colors=None,renderer=None,col_names=None,table_filter=None):
+  """
+  Build a table the plain way: list storage and one add_row per row
+  """
+  table=dynamic_table.Table(renderer or dynamic_table.RenderText(),output='String',table_filter=table_filter)
+  if col_names:
+    table.set_col_names(col_names)
+  for i,row in enumerate(rows):
+    table.add_row(row,row_colors[i] if row_colors else [])
+  return table
+
+def rendered(table,**render_args):
+  """
+  Returns the whole table rendered as a string
+  """
+  return ''.join(table.iter_render(**render_args))
+
+def row_lists(table):
+  """
+  Returns the rows of a table as lists of strings, padded to col_count
+  """
+  return [[str(c) for c in row]+['']*(table.col_count-len(row)) for row in table.rows]
+
+def renderers():
+  return [dynamic_table.RenderText(),dynamic_table.RenderCSV(),dynamic_table.RenderHTML()]